@@ -1,9 +1,11 @@
 # Core module initialization
 from app.core.config import settings
-from app.core.database import get_db, engine, Base
+from app.core.database import get_db, get_read_db, engine, Base
 from app.core.security import (
     hash_password,
     verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     get_current_user,
     require_merchant,
@@ -13,10 +15,13 @@ from app.core.security import (
 __all__ = [
     "settings",
     "get_db",
+    "get_read_db",
     "engine",
     "Base",
     "hash_password",
     "verify_password",
+    "hash_password_async",
+    "verify_password_async",
     "create_access_token",
     "get_current_user",
     "require_merchant",
@@ -1,8 +1,114 @@
 """Authentication and authorization utilities."""
+from dataclasses import dataclass
+import logging
 from fastapi import Header, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import (
+    api_key_prefix,
+    generate_api_key,
+    hash_api_key,
+    invalidate_merchant_tokens,
+    verify_api_key,
+)
 from app.models import Merchant
-from typing import Optional
+from app.services.lookups import get_merchant_by_api_key, get_merchant_by_api_key_prefix
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MerchantPrincipal:
+    """The merchant fields API-key authenticated endpoints need, detached from the DB session."""
+    id: Any
+    name: str
+    email: str
+    is_active: bool
+    stellar_address: Optional[str]
+    webhook_url: Optional[str]
+
+
+# API key hash -> MerchantPrincipal. Each worker holds its own copy; the TTL
+# bounds how long other workers keep serving a principal after it changes.
+api_key_cache = TTLCache(maxsize=settings.API_KEY_CACHE_SIZE, ttl=settings.API_KEY_CACHE_TTL_SECONDS)
+
+
+def issue_api_key(merchant: Merchant) -> str:
+    """
+    Give a merchant a new API key and return it.
+    
+    Only the prefix and hash are stored, so the returned key must be shown
+    to the merchant now; it cannot be recovered later. The caller commits.
+    """
+    api_key = generate_api_key()
+    merchant.api_key = None
+    merchant.api_key_prefix = api_key_prefix(api_key)
+    merchant.api_key_hash = hash_api_key(api_key)
+    return api_key
+
+
+def _authenticate_api_key(db: Session, api_key: str, api_key_hash: str) -> Optional[Merchant]:
+    """Find the merchant owning ``api_key`` by its indexed prefix, then verify the hash."""
+    merchant = get_merchant_by_api_key_prefix(db, api_key_prefix(api_key))
+    if merchant and verify_api_key(api_key_hash, merchant.api_key_hash):
+        return merchant
+    
+    # Keys issued before hashing are still stored in plaintext until the
+    # backfill script runs; hash them on first use.
+    merchant = get_merchant_by_api_key(db, api_key)
+    if not merchant or merchant.api_key_hash:
+        return None
+    
+    merchant.api_key = None
+    merchant.api_key_prefix = api_key_prefix(api_key)
+    merchant.api_key_hash = api_key_hash
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another merchant's key shares the prefix; keep the plaintext key for now
+        db.rollback()
+        logger.warning(f"Could not hash legacy API key of merchant {merchant.id}: prefix in use")
+    return merchant
+
+
+def get_merchant_principal(db: Session, api_key: str) -> Optional[MerchantPrincipal]:
+    """
+    Resolve an API key to its merchant, from cache when possible.
+    
+    Unknown keys are not cached, so a newly issued key works immediately.
+    """
+    api_key_hash = hash_api_key(api_key)
+    principal = api_key_cache.get(api_key_hash)
+    if principal is not None:
+        return principal
+    
+    merchant = _authenticate_api_key(db, api_key, api_key_hash)
+    if not merchant:
+        return None
+    
+    principal = MerchantPrincipal(
+        id=merchant.id,
+        name=merchant.name,
+        email=merchant.email,
+        is_active=merchant.is_active,
+        stellar_address=merchant.stellar_address,
+        webhook_url=merchant.webhook_url
+    )
+    api_key_cache.set(api_key_hash, principal)
+    return principal
+
+
+def invalidate_merchant_principal(merchant_id) -> int:
+    """
+    Drop cached principals of a merchant after its profile, API key or
+    status changes, for both API-key and JWT authentication.
+    """
+    invalidate_merchant_tokens(merchant_id)
+    merchant_id = str(merchant_id)
+    return api_key_cache.delete_where(lambda key, principal: str(principal.id) == merchant_id)
 
 
 async def get_api_key(
@@ -27,21 +133,21 @@ async def get_api_key(
     return x_api_key
 
 
-async def validate_merchant_api_key(api_key: str, db: Session) -> Merchant:
+async def validate_merchant_api_key(api_key: str, db: Session) -> MerchantPrincipal:
     """
-    Validate API key and return merchant object.
+    Validate API key and return the merchant principal.
     
     Args:
         api_key: The API key to validate
         db: Database session
         
     Returns:
-        Merchant object if valid
+        MerchantPrincipal if valid
         
     Raises:
         HTTPException if invalid
     """
-    merchant = db.query(Merchant).filter(Merchant.api_key == api_key).first()
+    merchant = get_merchant_principal(db, api_key)
     
     if not merchant:
         raise HTTPException(
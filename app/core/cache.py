@@ -0,0 +1,138 @@
+"""In-process caching utilities."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe, bounded LRU cache with a per-entry time-to-live.
+
+    Loads are single-flight: when several callers miss on the same key at
+    once, the loader runs only once and every caller gets its result.
+    ``loads`` and ``coalesced`` count loader runs and the misses that
+    joined one already in flight.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def loads_in_flight(self) -> int:
+        return len(self._inflight)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for ``key`` or ``default`` if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store ``value`` under ``key``, evicting the least recently used entry if full."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Remove ``key`` if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Remove every entry for which ``predicate(key, value)`` is true."""
+        with self._lock:
+            keys = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value, calling ``loader`` once on a miss."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have loaded the value while we waited
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            try:
+                value = loader()
+                self.set(key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    async def get_or_load_async(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        store: bool = True
+    ) -> Any:
+        """
+        Async variant of ``get_or_load``; concurrent misses await one load.
+
+        With ``store=False`` the result is not cached here; the loader
+        decides whether and how to cache it.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        future = self._inflight.get(key)
+        if future is None:
+            self.loads += 1
+            future = asyncio.ensure_future(loader())
+            self._inflight[key] = future
+
+            def _store(done: asyncio.Future):
+                self._inflight.pop(key, None)
+                if store and not done.cancelled() and done.exception() is None:
+                    self.set(key, done.result(), ttl)
+
+            future.add_done_callback(_store)
+        else:
+            self.coalesced += 1
+
+        # Shield so one cancelled caller does not cancel the shared load
+        return await asyncio.shield(future)
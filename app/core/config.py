@@ -5,12 +5,54 @@ from typing import List
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./payment_gateway.db"
+    DATABASE_REPLICA_URLS: str = ""  # Comma-separated read replicas (optional)
+    REPLICA_MAX_LAG_SECONDS: float = 5.0  # Replicas lagging more than this are skipped
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5.0
+    
+    # SQLite profile (ignored for other databases)
+    SQLITE_WAL: bool = True  # WAL lets readers run alongside the writer
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait this long for another process's write lock
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # NORMAL is durable enough with WAL and much faster than FULL
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB memory-mapped I/O
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection
+    SQLITE_SERIALIZE_WRITES: bool = True  # Queue write transactions within each process
     
     # JWT
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
     
+    # Password hashing (bcrypt runs on a bounded thread pool, off the event loop)
+    BCRYPT_ROUNDS: int = 12  # Each +1 doubles the cost of hashing and login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16  # Further auth requests get 503 + Retry-After
+    
+    # Rate limiting (token buckets; requests/second refill rate and burst size)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per worker) or redis (shared)
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_TRUST_PROXY_HEADERS: bool = False  # Use X-Forwarded-For for the client IP
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = 1  # Proxies in front of the app that append to X-Forwarded-For
+    RATE_LIMIT_IP_PER_SECOND: float = 20.0
+    RATE_LIMIT_IP_BURST: int = 100
+    RATE_LIMIT_API_KEY_PER_SECOND: float = 10.0
+    RATE_LIMIT_API_KEY_BURST: int = 50
+    RATE_LIMIT_MERCHANT_PER_SECOND: float = 20.0
+    RATE_LIMIT_MERCHANT_BURST: int = 100
+    
+    # API keys are stored as HMAC-SHA256 hashes. Defaults to JWT_SECRET; set it
+    # explicitly so rotating JWT_SECRET does not invalidate every API key.
+    API_KEY_HASH_SECRET: str = ""
+    
+    # JWT principal cache (per worker); bounds how long a disabled merchant's
+    # token keeps working on other workers
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 15
+    
+    # API key authentication cache (per worker)
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_CACHE_TTL_SECONDS: int = 60  # Upper bound on staleness in other workers
+    
     # Stellar
     STELLAR_NETWORK: str = "testnet"
     STELLAR_HORIZON_URL: str = "https://horizon-testnet.stellar.org"
@@ -19,9 +61,40 @@ class Settings(BaseSettings):
     
     # Payment
     PAYMENT_EXPIRY_MINUTES: int = 15
+    SESSION_BATCH_MAX_SIZE: int = 10000  # Sessions per POST /api/sessions/batch
+    CHECKOUT_QR_FORMAT: str = "png"  # png or svg (svg is rendered without PIL)
+    QR_CACHE_SIZE: int = 1024  # Rendered QR images kept in memory per worker
+    CHECKOUT_CONTEXT_CACHE_SIZE: int = 1024  # Merchants' precompiled checkout pages per worker
+    CHECKOUT_CONTEXT_TTL_SECONDS: int = 60  # How long other workers may show an old address
+    STATIC_MAX_AGE_SECONDS: int = 300  # Cache lifetime of unversioned /public URLs (e.g. chainpe-button.js)
     WEBHOOK_RETRY_LIMIT: int = 3
     WEBHOOK_TIMEOUT_SECONDS: int = 10
     
+    # Analytics
+    STATS_HOURLY_RETENTION_DAYS: int = 7  # Older hourly buckets are compacted into days
+    STATS_COMPACTION_INTERVAL_SECONDS: int = 3600
+    STATS_CACHE_TTL_SECONDS: int = 30  # Public/admin gateway stats
+    
+    # Background jobs (run inside each API worker)
+    BACKGROUND_JOBS_ENABLED: bool = True
+    SESSION_SWEEP_INTERVAL_SECONDS: int = 30  # How often due sessions are expired
+    
+    # Server-Sent Events for checkout status (replaces client polling)
+    SESSION_EVENTS_POLL_INTERVAL_SECONDS: float = 1.0  # Non-PostgreSQL databases only
+    SESSION_EVENTS_KEEPALIVE_SECONDS: int = 15
+    SESSION_EVENTS_MAX_STREAM_SECONDS: int = 1800  # Clients reconnect after this
+    SESSION_LONG_POLL_MAX_SECONDS: int = 30  # Upper bound for ?wait= on status endpoints
+    
+    # Session status cache (per worker)
+    SESSION_CACHE_SIZE: int = 10000
+    SESSION_CACHE_TTL_SECONDS: int = 300
+    SESSION_CACHE_PENDING_TTL_SECONDS: int = 2  # Pending sessions, when not on PostgreSQL
+    
+    # Archival of closed sessions to payment_sessions_archive (0 = keep forever)
+    ARCHIVE_EXPIRED_AFTER_DAYS: int = 30
+    ARCHIVE_PAID_AFTER_DAYS: int = 365
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+    
     # Application
     APP_HOST: str = "0.0.0.0"
     APP_PORT: int = 8000
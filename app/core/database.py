@@ -1,21 +1,234 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args={
+        "check_same_thread": False,
+        "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+    } if is_sqlite else {}
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+class WriterQueue:
+    """
+    FIFO lock that lets one write transaction at a time through.
+
+    SQLite allows a single writer per database. Queueing writers in the
+    process gives them a fair, predictable wait instead of racing for the
+    file lock and backing off.
+
+    The queue is held by the ``Session`` writing, not by a thread: request
+    sessions are used on the event loop thread but closed on a threadpool
+    thread, and several of them interleave on the loop. Only threads off the
+    event loop wait their turn; a session writing on the loop takes the
+    queue when it is free and otherwise leaves arbitration to SQLite's busy
+    timeout, so the loop never blocks on the queue.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._waiting: deque = deque()
+        self._owner: Optional[object] = None
+
+    def acquire(self, owner: object, timeout: Optional[float] = None) -> bool:
+        """Wait up to ``timeout`` seconds (default: the queue's) for ``owner``'s turn to write."""
+        timeout = self.timeout if timeout is None else timeout
+        with self._condition:
+            if self._owner is owner:
+                return True
+            if timeout <= 0:
+                if self._owner is None and not self._waiting:
+                    self._owner = owner
+                    return True
+                return False
+            ticket = object()
+            self._waiting.append(ticket)
+            acquired = self._condition.wait_for(
+                lambda: self._owner is None and self._waiting[0] is ticket,
+                timeout=timeout
+            )
+            if not acquired:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+                return False
+            self._waiting.popleft()
+            self._owner = owner
+            return True
+
+    def release(self, owner: object):
+        """Release the queue if ``owner`` holds it. Safe to call from any thread."""
+        with self._condition:
+            if self._owner is not owner:
+                return
+            self._owner = None
+            self._condition.notify_all()
+
+
+writer_queue = WriterQueue(timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection for concurrent API + listener use."""
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _queue_writer(session: Session):
+    """Take the writer queue the first time a session is about to write."""
+    if session.info.get("holds_writer_queue"):
+        return
+    if _on_event_loop():
+        # Never block the event loop; without the queue SQLite's busy timeout arbitrates
+        if writer_queue.acquire(session, timeout=0):
+            session.info["holds_writer_queue"] = True
+        return
+    if not writer_queue.acquire(session):
+        logger.warning("Timed out waiting for the SQLite writer queue; relying on busy_timeout")
+        return
+    session.info["holds_writer_queue"] = True
+
+
+def _release_writer(session: Session, transaction=None):
+    """Release the writer queue once the session's transaction ends."""
+    if transaction is not None and transaction.parent is not None:
+        return
+    if session.info.pop("holds_writer_queue", False):
+        writer_queue.release(session)
+
+
+if is_sqlite:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+
+    if settings.SQLITE_SERIALIZE_WRITES:
+        event.listen(
+            SessionLocal, "before_flush",
+            lambda session, flush_context, instances: _queue_writer(session)
+        )
+        event.listen(
+            SessionLocal, "do_orm_execute",
+            lambda state: _queue_writer(state.session)
+            if state.is_insert or state.is_update or state.is_delete else None
+        )
+        event.listen(SessionLocal, "after_transaction_end", _release_writer)
+
+# Optional read replicas for reporting and read-only endpoints
+replica_engines = [
+    create_engine(url.strip(), pool_pre_ping=True)
+    for url in settings.DATABASE_REPLICA_URLS.split(",")
+    if url.strip()
+]
+_replica_sessions = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
+_replica_lag: Dict[int, Tuple[float, Optional[float]]] = {}
+_replica_round_robin = itertools.count()
+
 # Base class for models
 Base = declarative_base()
 
 
+def approximate_count(db, model, exact_below: int = 10000) -> int:
+    """
+    Count rows in a model's table using planner statistics where available.
+    
+    On PostgreSQL this reads ``pg_class.reltuples`` (kept current by
+    autovacuum/ANALYZE) instead of scanning the table. Small or never
+    analyzed tables, and other databases, fall back to an exact count.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": model.__tablename__}
+        ).scalar()
+        if estimate is not None and estimate >= exact_below:
+            return int(estimate)
+    
+    return db.query(model).count()
+
+
+def _replica_lag_seconds(index: int) -> Optional[float]:
+    """
+    Return the replication lag of a replica in seconds, or None if it is
+    unreachable. Results are cached for REPLICA_LAG_CHECK_INTERVAL_SECONDS.
+    """
+    checked_at, lag = _replica_lag.get(index, (0.0, None))
+    if time.monotonic() - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS:
+        return lag
+    
+    replica_engine = replica_engines[index]
+    try:
+        with replica_engine.connect() as conn:
+            if replica_engine.dialect.name == "postgresql":
+                lag = conn.execute(text(
+                    "SELECT CASE "
+                    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                    "END"
+                )).scalar()
+                lag = float(lag or 0)
+            else:
+                conn.execute(text("SELECT 1"))
+                lag = 0.0
+    except Exception as e:
+        logger.warning(f"Read replica {index} unavailable: {e}")
+        lag = None
+    
+    _replica_lag[index] = (time.monotonic(), lag)
+    return lag
+
+
+def create_read_session() -> Session:
+    """
+    Create a session for read-only work.
+    
+    Picks replicas round-robin, skipping any that are unreachable or lag
+    more than REPLICA_MAX_LAG_SECONDS. Falls back to the primary when no
+    replica is configured or healthy. Never write through this session.
+    """
+    for _ in range(len(_replica_sessions)):
+        index = next(_replica_round_robin) % len(_replica_sessions)
+        lag = _replica_lag_seconds(index)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS:
+            return _replica_sessions[index]()
+    
+    return SessionLocal()
+
+
 def get_db():
     """Dependency to get database session."""
     db = SessionLocal()
@@ -23,3 +236,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    Dependency to get a read-only database session, served by a replica
+    when one is configured and fresh enough.
+    
+    Use only for list, stats, export and detail reads that tolerate
+    REPLICA_MAX_LAG_SECONDS of staleness. Writes and read-your-writes
+    paths (creation, settlement, status checks) must use ``get_db``.
+    """
+    db = create_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
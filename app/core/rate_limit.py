@@ -0,0 +1,274 @@
+"""
+Rate Limiting
+Token-bucket limits per client IP, per API key and per merchant.
+
+Every request spends one token from each bucket it belongs to. Buckets
+refill continuously at their configured rate up to their burst size. When
+any bucket is empty the request is rejected with 429 and ``Retry-After``.
+
+The in-memory backend keeps buckets per worker. For several workers or
+instances set ``RATE_LIMIT_BACKEND=redis`` so they share buckets (requires
+the ``redis`` package).
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+
+from app.core.auth import api_key_cache
+from app.core.config import settings
+from app.core.security import api_key_prefix, hash_api_key, token_cache
+
+logger = logging.getLogger(__name__)
+
+# Paths that are never limited (health checks, docs)
+EXEMPT_PATHS = {"/", "/health", "/docs", "/redoc", "/openapi.json"}
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    scope: str
+    rate_per_second: float
+    burst: int
+
+
+IP_RULE = RateLimitRule("ip", settings.RATE_LIMIT_IP_PER_SECOND, settings.RATE_LIMIT_IP_BURST)
+API_KEY_RULE = RateLimitRule("api_key", settings.RATE_LIMIT_API_KEY_PER_SECOND, settings.RATE_LIMIT_API_KEY_BURST)
+MERCHANT_RULE = RateLimitRule("merchant", settings.RATE_LIMIT_MERCHANT_PER_SECOND, settings.RATE_LIMIT_MERCHANT_BURST)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets held in this process, bounded to ``max_buckets`` (LRU)."""
+
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(rule.burst), now))
+            tokens = min(rule.burst, tokens + (now - updated_at) * rule.rate_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+
+        retry_after = 0.0 if allowed else (cost - tokens) / rule.rate_per_second
+        return RateLimitResult(allowed=allowed, remaining=int(tokens), retry_after=retry_after)
+
+
+# Atomic token bucket: KEYS[1] = bucket, ARGV = rate, burst, now, cost
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared by all workers through Redis."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        try:
+            allowed, tokens = await self._script(
+                keys=[self.prefix + key],
+                args=[rule.rate_per_second, rule.burst, time.time(), cost]
+            )
+        except Exception as e:
+            # Fail open: an unavailable limiter must not take the API down
+            logger.warning(f"Rate limit backend unavailable: {e}")
+            return RateLimitResult(allowed=True, remaining=rule.burst, retry_after=0.0)
+
+        tokens = float(tokens)
+        retry_after = 0.0 if allowed else (cost - tokens) / rule.rate_per_second
+        return RateLimitResult(allowed=bool(allowed), remaining=int(tokens), retry_after=retry_after)
+
+
+class UsageCounters:
+    """Allowed/limited request counts per bucket, for the admin usage report."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[Tuple[str, str], Dict[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, scope: str, label: str, allowed: bool):
+        key = (scope, label)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = {"allowed": 0, "limited": 0}
+            counts["allowed" if allowed else "limited"] += 1
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def top(self, limit: int = 50, scope: Optional[str] = None) -> List[dict]:
+        """Return the busiest buckets, most limited first."""
+        with self._lock:
+            rows = [
+                {"scope": key_scope, "key": label, **counts}
+                for (key_scope, label), counts in self._counts.items()
+                if scope is None or key_scope == scope
+            ]
+        rows.sort(key=lambda row: (row["limited"], row["allowed"]), reverse=True)
+        return rows[:limit]
+
+
+def create_backend():
+    """Create the configured rate limit backend."""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryRateLimitBackend()
+
+
+backend = create_backend()
+usage = UsageCounters()
+
+
+def client_ip(request: Request) -> str:
+    """
+    Return the client IP, honouring X-Forwarded-For only behind a trusted proxy.
+
+    Each of the RATE_LIMIT_TRUSTED_PROXY_HOPS proxies appends the address it
+    received the request from, so the client's address is that many entries
+    from the right. Entries left of it are written by the client and ignored.
+    """
+    if settings.RATE_LIMIT_TRUST_PROXY_HEADERS:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",")]
+        hops = max(settings.RATE_LIMIT_TRUSTED_PROXY_HOPS, 1)
+        if len(forwarded) >= hops and forwarded[-hops]:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+def _request_buckets(request: Request) -> List[Tuple[RateLimitRule, str, str]]:
+    """
+    Return ``(rule, bucket key, usage label)`` for each bucket the request spends from.
+
+    Merchants are identified from the auth caches only, so limiting never
+    costs a database query; a merchant's first request after a cache miss
+    is limited by API key and IP alone.
+    """
+    ip = client_ip(request)
+    buckets = [(IP_RULE, f"ip:{ip}", ip)]
+    merchant_id = None
+
+    api_key = request.headers.get("x-api-key") or request.query_params.get("api_key")
+    if api_key:
+        api_key_hash = hash_api_key(api_key)
+        buckets.append((API_KEY_RULE, f"key:{api_key_hash}", api_key_prefix(api_key)))
+        principal = api_key_cache.get(api_key_hash)
+        if principal is not None:
+            merchant_id = str(principal.id)
+
+    authorization = request.headers.get("authorization", "")
+    if merchant_id is None and authorization.lower().startswith("bearer "):
+        principal = token_cache.get(authorization[7:])
+        if principal is not None and principal["role"] == "merchant":
+            merchant_id = principal["id"]
+
+    if merchant_id is not None:
+        buckets.append((MERCHANT_RULE, f"merchant:{merchant_id}", merchant_id))
+    return buckets
+
+
+def _limit_headers(rule: RateLimitRule, result: RateLimitResult) -> Dict[str, str]:
+    headers = {
+        "X-RateLimit-Limit": str(rule.burst),
+        "X-RateLimit-Remaining": str(max(result.remaining, 0)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+    return headers
+
+
+async def _consume_all(buckets: List[Tuple[RateLimitRule, str, str]]) -> Tuple[RateLimitRule, RateLimitResult]:
+    """Spend a token from every bucket; return the rule and result that limit the request."""
+    tightest = None
+    for rule, key, label in buckets:
+        result = await backend.consume(key, rule)
+        usage.record(rule.scope, label, result.allowed)
+        if not result.allowed:
+            return rule, result
+        if tightest is None or result.remaining < tightest[1].remaining:
+            tightest = (rule, result)
+    return tightest
+
+
+async def rate_limit_requests(request: Request, call_next):
+    """HTTP middleware applying the IP, API key and merchant limits."""
+    if not settings.RATE_LIMIT_ENABLED or request.url.path in EXEMPT_PATHS or request.method == "OPTIONS":
+        return await call_next(request)
+
+    rule, result = await _consume_all(_request_buckets(request))
+    if not result.allowed:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": f"Rate limit exceeded ({rule.scope}), retry later"},
+            headers=_limit_headers(rule, result)
+        )
+
+    response = await call_next(request)
+    response.headers.update(_limit_headers(rule, result))
+    return response
+
+
+async def enforce_api_key_limit(api_key: str):
+    """
+    Apply the API key limit to a key sent in the request body.
+
+    The middleware only sees keys in the ``X-API-Key`` header or query
+    string; handlers taking the key in JSON call this after parsing.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    result = await backend.consume(f"key:{hash_api_key(api_key)}", API_KEY_RULE)
+    usage.record(API_KEY_RULE.scope, api_key_prefix(api_key), result.allowed)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded (api_key), retry later",
+            headers=_limit_headers(API_KEY_RULE, result)
+        )
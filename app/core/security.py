@@ -1,19 +1,41 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import hmac
+import secrets
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.database import get_db
 
 security = HTTPBearer()
 
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+_password_jobs_pending = 0
+
+# Bearer token -> authenticated principal. Saves the JWT decode and, for
+# merchants, the merchant lookup on every dashboard request. Entries are
+# evicted when the merchant changes; other workers catch up within the TTL.
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
+
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt. Truncates to 72 bytes for compatibility."""
     # Bcrypt has a 72-byte limit
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -28,6 +50,72 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+async def _run_password_job(func, *args):
+    """
+    Run a bcrypt call on the password pool.
+    
+    At most PASSWORD_HASH_MAX_PENDING calls may be queued or running per
+    worker; beyond that the request is rejected with 503 so a login burst
+    cannot build an unbounded backlog.
+    """
+    global _password_jobs_pending
+    if _password_jobs_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    
+    _password_jobs_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_jobs_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await _run_password_job(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop."""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+# Leading characters of an API key stored in clear and indexed for lookup
+API_KEY_PREFIX_LENGTH = 16
+
+
+def generate_api_key() -> str:
+    """Generate a secure API key for a merchant."""
+    return f"pk_live_{secrets.token_urlsafe(32)}"
+
+
+def api_key_prefix(api_key: str) -> str:
+    """Return the public lookup prefix of an API key, e.g. ``pk_live_Ab3dE9xQ``."""
+    return api_key[:API_KEY_PREFIX_LENGTH]
+
+
+def hash_api_key(api_key: str) -> str:
+    """
+    Hash an API key with HMAC-SHA256.
+    
+    API keys are long random tokens, so a fast keyed hash is sufficient; a
+    slow password hash would cost milliseconds on every API call.
+    """
+    secret = (settings.API_KEY_HASH_SECRET or settings.JWT_SECRET).encode('utf-8')
+    return hmac.new(secret, api_key.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def verify_api_key(api_key_hash: str, stored_hash: Optional[str]) -> bool:
+    """Compare an API key hash against the stored one in constant time."""
+    if not stored_hash:
+        return False
+    return hmac.compare_digest(api_key_hash, stored_hash)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -55,9 +143,10 @@ def decode_access_token(token: str) -> dict:
         )
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """Get current authenticated user from JWT token."""
-    token = credentials.credentials
+def _load_principal(token: str, db: Session) -> dict:
+    """Decode a token and, for merchants, load the account it belongs to."""
+    from app.services.lookups import get_merchant_by_id
+    
     payload = decode_access_token(token)
     
     user_id = payload.get("sub")
@@ -69,7 +158,67 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Could not validate credentials",
         )
     
-    return {"id": user_id, "role": role}
+    principal = {"id": user_id, "role": role, "exp": payload.get("exp")}
+    
+    if role == "merchant":
+        merchant = get_merchant_by_id(db, uuid.UUID(user_id))
+        if not merchant:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+            )
+        principal["is_active"] = merchant.is_active
+        principal["profile"] = {
+            "id": str(merchant.id),
+            "name": merchant.name,
+            "email": merchant.email,
+            "stellar_address": merchant.stellar_address,
+            "webhook_url": merchant.webhook_url,
+            "is_active": merchant.is_active,
+            "created_at": merchant.created_at,
+            "api_key_prefix": merchant.api_key_prefix,
+        }
+    
+    return principal
+
+
+def invalidate_merchant_tokens(merchant_id) -> int:
+    """Drop cached principals of a merchant so its next request reloads the account."""
+    merchant_id = str(merchant_id)
+    return token_cache.delete_where(
+        lambda token, principal: principal["role"] == "merchant" and principal["id"] == merchant_id
+    )
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> dict:
+    """
+    Get current authenticated user from JWT token.
+    
+    Merchant principals also carry ``is_active`` and the cached ``profile``.
+    Disabled merchants are rejected.
+    """
+    token = credentials.credentials
+    principal = token_cache.get(token)
+    
+    if principal is None:
+        principal = _load_principal(token, db)
+        # Never cache a token beyond its own expiry
+        ttl = token_cache.ttl
+        if principal["exp"] is not None:
+            ttl = min(ttl, principal["exp"] - time.time())
+        if ttl > 0:
+            token_cache.set(token, principal, ttl)
+    
+    if principal.get("is_active") is False:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is disabled"
+        )
+    
+    return principal
 
 
 def require_role(required_role: str):
@@ -0,0 +1,144 @@
+"""
+Static Files
+Serves public/ from the build made by ``scripts/build_assets.py``.
+
+- Fingerprinted files (``dist/chainpe-button.<hash>.js``) never change
+  under their name and are cached for a year as ``immutable``.
+- Source names (``chainpe-button.js``, which merchants embed) are answered
+  with the current minified build, cached for STATIC_MAX_AGE_SECONDS and
+  revalidated with ETags after that.
+- Built files are sent as their precompressed .br or .gz sibling when the
+  client accepts that encoding, with ``Vary: Accept-Encoding``.
+- Built files get ETags from their content rather than from mtime and
+  size, so a rebuild or another instance serving the same bytes keeps
+  answering revalidations with 304.
+
+Without a build, public/ is served as is.
+"""
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import stat
+from typing import Dict, List, Optional
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Preferred first
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IDENTITY_ENCODING = (None, "")
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """Return the content codings an Accept-Encoding header allows (q > 0)."""
+    encodings = []
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) <= 0:
+                continue
+        except ValueError:
+            continue
+        if coding:
+            encodings.append(coding.strip().lower())
+    return encodings
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """``StaticFiles`` serving minified, fingerprinted and precompressed builds."""
+
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.manifest: Dict[str, str] = self._load_manifest(directory)
+        self.fingerprinted = {
+            f"{DIST_DIR}/{built}" for name, built in self.manifest.items() if built != name
+        }
+        self.etags: Dict[str, str] = self._content_etags(directory) if self.manifest else {}
+
+    @staticmethod
+    def _load_manifest(directory: str) -> Dict[str, str]:
+        try:
+            with open(os.path.join(directory, DIST_DIR, MANIFEST_NAME)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def _content_etags(directory: str) -> Dict[str, str]:
+        """Return an ETag for every built file, keyed by its path under ``directory``."""
+        etags = {}
+        dist_dir = os.path.join(directory, DIST_DIR)
+        for name in os.listdir(dist_dir):
+            full_path = os.path.join(dist_dir, name)
+            if os.path.isfile(full_path):
+                with open(full_path, "rb") as f:
+                    etags[f"{DIST_DIR}/{name}"] = f'"{hashlib.md5(f.read(), usedforsecurity=False).hexdigest()}"'
+        return etags
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        built = self.manifest.get(path)
+        if built is not None:
+            path = f"{DIST_DIR}/{built}"
+            cache_control = f"public, max-age={settings.STATIC_MAX_AGE_SECONDS}"
+        elif path in self.fingerprinted:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("Cache-Control", f"public, max-age={settings.STATIC_MAX_AGE_SECONDS}")
+            return response
+
+        if scope["method"] in ("GET", "HEAD"):
+            response = await self._built_response(path, scope, cache_control)
+            if response is not None:
+                return response
+
+        response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    async def _built_response(self, path: str, scope: Scope, cache_control: str) -> Optional[Response]:
+        """Send the best encoding of a built file the client accepts, with its content ETag."""
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding"))
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS + (IDENTITY_ENCODING,):
+            if encoding is not None and encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            headers = {
+                "Cache-Control": cache_control,
+                "Vary": "Accept-Encoding",
+            }
+            if encoding is not None:
+                headers["Content-Encoding"] = encoding
+            etag = self.etags.get(path + suffix)
+            if etag is not None:
+                # FileResponse only derives an ETag from mtime and size when none is given
+                headers["ETag"] = etag
+            response = FileResponse(
+                full_path,
+                stat_result=stat_result,
+                media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                headers=headers
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
@@ -1,12 +1,13 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 import time
 import logging
 import os
 
 from app.core.config import settings
+from app.core.static_files import PrecompressedStaticFiles
+from app.core.rate_limit import rate_limit_requests
 from app.routes import auth, merchant, payments, checkout, admin, merchant_payments, public, admin_webhooks, escrow, sessions, integrations
 
 # Configure logging
@@ -25,6 +26,9 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Rate limiting - registered before CORS so 429 responses still carry CORS headers
+app.middleware("http")(rate_limit_requests)
+
 # Configure CORS - Allow all origins for e-commerce integrations
 app.add_middleware(
     CORSMiddleware,
@@ -87,8 +91,12 @@ app.include_router(escrow.router)  # Soroban escrow endpoints
 # Serve static files (ChainPe button SDK and demo)
 public_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "public")
 if os.path.exists(public_dir):
-    app.mount("/public", StaticFiles(directory=public_dir), name="public")
-    logger.info(f"✅ Serving static files from {public_dir}")
+    static_files = PrecompressedStaticFiles(directory=public_dir)
+    app.mount("/public", static_files, name="public")
+    if static_files.manifest:
+        logger.info(f"✅ Serving {len(static_files.manifest)} built static file(s) from {public_dir}")
+    else:
+        logger.warning("⚠️  No static asset build found; run python -m scripts.build_assets")
 else:
     logger.warning(f"⚠️  Public directory not found: {public_dir}")
 
@@ -157,6 +165,22 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Database initialization error: {e}")
     
+    # Push session status changes to checkout pages
+    from app.services.session_events import start_session_events
+    start_session_events()
+    
+    # Periodic maintenance jobs
+    if settings.BACKGROUND_JOBS_ENABLED:
+        from app.services.background_jobs import register_job, start_background_jobs
+        from app.services.payment_timeseries import compact_hourly_buckets
+        from app.services.session_expiry import expire_due_sessions
+        from app.services.session_archive import run_session_maintenance
+        
+        register_job("expire_due_sessions", settings.SESSION_SWEEP_INTERVAL_SECONDS, expire_due_sessions)
+        register_job("compact_hourly_buckets", settings.STATS_COMPACTION_INTERVAL_SECONDS, compact_hourly_buckets)
+        register_job("session_maintenance", settings.ARCHIVE_INTERVAL_SECONDS, run_session_maintenance)
+        start_background_jobs()
+    
     logger.info(f"Network: {settings.STELLAR_NETWORK}")
     logger.info(f"Base URL: {settings.APP_BASE_URL}")
     logger.info(f"USDC Asset: {settings.USDC_ASSET_CODE}:{settings.USDC_ASSET_ISSUER}")
@@ -173,6 +197,12 @@ async def startup_event():
 async def shutdown_event():
     """Run on application shutdown."""
     logger.info("Shutting down Stellar Payment Gateway...")
+    
+    from app.services.background_jobs import stop_background_jobs
+    await stop_background_jobs()
+    
+    from app.services.session_events import stop_session_events
+    await stop_session_events()
 
 
 if __name__ == "__main__":
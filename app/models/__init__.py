@@ -1,4 +1,22 @@
 # Models module initialization
-from app.models.models import Merchant, PaymentSession, Admin, PaymentStatus
+from app.models.models import (
+    Merchant,
+    PaymentSession,
+    PaymentSessionArchive,
+    PaymentRollup,
+    PaymentHourlyBucket,
+    PaymentDailyBucket,
+    Admin,
+    PaymentStatus,
+)
 
-__all__ = ["Merchant", "PaymentSession", "Admin", "PaymentStatus"]
+__all__ = [
+    "Merchant",
+    "PaymentSession",
+    "PaymentSessionArchive",
+    "PaymentRollup",
+    "PaymentHourlyBucket",
+    "PaymentDailyBucket",
+    "Admin",
+    "PaymentStatus",
+]
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Numeric, Enum as SQLEnum
+from sqlalchemy import Column, String, Boolean, Date, DateTime, ForeignKey, Index, Integer, Numeric, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -20,7 +20,9 @@ class Merchant(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False, index=True)
     password_hash = Column(String, nullable=False)
-    api_key = Column(String, unique=True, nullable=True, index=True)  # For API authentication
+    api_key = Column(String, unique=True, nullable=True, index=True)  # Legacy plaintext key, cleared once hashed
+    api_key_prefix = Column(String, unique=True, nullable=True, index=True)  # Public lookup prefix of the API key
+    api_key_hash = Column(String, nullable=True)  # HMAC-SHA256 of the full API key
     stellar_address = Column(String, nullable=True)
     webhook_url = Column(String, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
@@ -44,9 +46,102 @@ class PaymentSession(Base):
     tx_hash = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     paid_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    version = Column(Integer, default=1, server_default="1", nullable=False)  # Bumped on every status change (ETags)
+    order_id = Column(String, nullable=True)  # Merchant's order reference, unique per merchant
+    idempotency_key = Column(String, nullable=True)  # Idempotency-Key header of the creating request
     
     # Relationships
     merchant = relationship("Merchant", back_populates="payment_sessions")
+    
+    __table_args__ = (
+        # Partial index over pending sessions only, used by the expiry sweeper
+        Index(
+            "idx_payment_sessions_pending_expiry",
+            expires_at,
+            postgresql_where=(status == PaymentStatus.CREATED),
+            sqlite_where=(status == PaymentStatus.CREATED),
+        ),
+        # Retried creates find the original session instead of inserting a duplicate.
+        # Expired sessions are left out so an order can be paid with a new session.
+        Index(
+            "uq_payment_sessions_merchant_order",
+            merchant_id, order_id,
+            unique=True,
+            postgresql_where=(status != PaymentStatus.EXPIRED),
+            sqlite_where=(status != PaymentStatus.EXPIRED),
+        ),
+        Index(
+            "uq_payment_sessions_merchant_idempotency_key",
+            merchant_id, idempotency_key,
+            unique=True,
+            postgresql_where=(status != PaymentStatus.EXPIRED),
+            sqlite_where=(status != PaymentStatus.EXPIRED),
+        ),
+    )
+
+
+class PaymentSessionArchive(Base):
+    """Closed sessions moved out of the hot payment_sessions table."""
+    __tablename__ = "payment_sessions_archive"
+    
+    id = Column(String, primary_key=True)
+    merchant_id = Column(UUID(as_uuid=True), ForeignKey("merchants.id"), nullable=False, index=True)
+    amount_fiat = Column(Numeric(precision=10, scale=2), nullable=False)
+    fiat_currency = Column(String, nullable=False)
+    amount_usdc = Column(String, nullable=False)
+    status = Column(SQLEnum(PaymentStatus), nullable=False)
+    success_url = Column(String, nullable=False)
+    cancel_url = Column(String, nullable=False)
+    tx_hash = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    paid_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    order_id = Column(String, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PaymentRollup(Base):
+    """
+    Per-merchant, per-day session counters maintained on every status change.
+    
+    Each row holds the net flow of sessions into ``status`` on ``day``: a
+    session entering a status adds to its row, leaving one subtracts from it.
+    Summing a status over all days therefore gives the current number of
+    sessions in that status, and PAID rows for a day are the payments
+    settled that day.
+    """
+    __tablename__ = "payment_rollups"
+    
+    merchant_id = Column(UUID(as_uuid=True), ForeignKey("merchants.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(SQLEnum(PaymentStatus), primary_key=True)
+    session_count = Column(Integer, default=0, nullable=False)
+    amount_usdc = Column(Numeric(precision=20, scale=7), default=0, nullable=False)
+
+
+class PaymentHourlyBucket(Base):
+    """Per-merchant session events per hour, used for time-series charts."""
+    __tablename__ = "payment_buckets_hourly"
+    
+    merchant_id = Column(UUID(as_uuid=True), ForeignKey("merchants.id"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    sessions_created = Column(Integer, default=0, nullable=False)
+    sessions_paid = Column(Integer, default=0, nullable=False)
+    sessions_expired = Column(Integer, default=0, nullable=False)
+    revenue_usdc = Column(Numeric(precision=20, scale=7), default=0, nullable=False)
+
+
+class PaymentDailyBucket(Base):
+    """Hourly buckets compacted into days once they leave the hourly window."""
+    __tablename__ = "payment_buckets_daily"
+    
+    merchant_id = Column(UUID(as_uuid=True), ForeignKey("merchants.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    sessions_created = Column(Integer, default=0, nullable=False)
+    sessions_paid = Column(Integer, default=0, nullable=False)
+    sessions_expired = Column(Integer, default=0, nullable=False)
+    revenue_usdc = Column(Numeric(precision=20, scale=7), default=0, nullable=False)
 
 
 class Admin(Base):
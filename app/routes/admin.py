@@ -1,17 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.core import get_db, require_admin
+from typing import List, Optional
+import asyncio
+from app.core import get_db, get_read_db, require_admin
+from app.core.auth import invalidate_merchant_principal
+from app.core.cache import TTLCache
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.database import create_read_session, approximate_count
 from app.models import Merchant, PaymentSession
 from app.schemas import MerchantListItem, PaymentListItem, MerchantDisable
+from app.services.payment_rollups import get_rollup_totals
+from app.services.lookups import get_merchant_by_id
+from app.services.session_cache import session_read_stats
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+health_cache = TTLCache(maxsize=1, ttl=settings.STATS_CACHE_TTL_SECONDS)
+
 
 @router.get("/merchants", response_model=List[MerchantListItem])
 async def list_all_merchants(
     current_user: dict = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100
 ):
@@ -34,7 +45,7 @@ async def list_all_merchants(
 @router.get("/payments", response_model=List[PaymentListItem])
 async def list_all_payments(
     current_user: dict = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100
 ):
@@ -66,7 +77,7 @@ async def disable_merchant(
     db: Session = Depends(get_db)
 ):
     """Enable or disable a merchant (admin only)."""
-    merchant = db.query(Merchant).filter(Merchant.id == merchant_id).first()
+    merchant = get_merchant_by_id(db, merchant_id)
     
     if not merchant:
         raise HTTPException(
@@ -76,38 +87,83 @@ async def disable_merchant(
     
     merchant.is_active = disable_data.is_active
     db.commit()
+    invalidate_merchant_principal(merchant.id)
     
     action = "enabled" if disable_data.is_active else "disabled"
     return {"message": f"Merchant {action} successfully"}
 
 
+def _compute_health_stats() -> dict:
+    """Compute gateway health figures in a dedicated read session."""
+    from app.models import PaymentStatus
+    
+    db = create_read_session()
+    try:
+        # The merchant total is informational, so planner statistics are
+        # good enough once the table is large
+        total_merchants = approximate_count(db, Merchant)
+        active_merchants = db.query(Merchant).filter(Merchant.is_active == True).count()
+        
+        totals = get_rollup_totals(db)
+        paid_sessions = totals[PaymentStatus.PAID]["count"]
+        pending_sessions = totals[PaymentStatus.CREATED]["count"]
+        expired_sessions = totals[PaymentStatus.EXPIRED]["count"]
+        
+        return {
+            "merchants": {
+                "total": total_merchants,
+                "active": active_merchants,
+                "inactive": max(total_merchants - active_merchants, 0)
+            },
+            "payments": {
+                "total": paid_sessions + pending_sessions + expired_sessions,
+                "paid": paid_sessions,
+                "pending": pending_sessions,
+                "expired": expired_sessions
+            }
+        }
+    finally:
+        db.close()
+
+
 @router.get("/health")
 async def gateway_health(
-    current_user: dict = Depends(require_admin),
-    db: Session = Depends(get_db)
+    current_user: dict = Depends(require_admin)
 ):
-    """Get gateway health statistics (admin only)."""
-    from app.models import PaymentStatus
+    """Get gateway health statistics (admin only). Cached for STATS_CACHE_TTL_SECONDS."""
+    stats = await health_cache.get_or_load_async(
+        "health",
+        lambda: asyncio.to_thread(_compute_health_stats)
+    )
     
-    total_merchants = db.query(Merchant).count()
-    active_merchants = db.query(Merchant).filter(Merchant.is_active == True).count()
-    
-    total_sessions = db.query(PaymentSession).count()
-    paid_sessions = db.query(PaymentSession).filter(PaymentSession.status == PaymentStatus.PAID).count()
-    pending_sessions = db.query(PaymentSession).filter(PaymentSession.status == PaymentStatus.CREATED).count()
-    expired_sessions = db.query(PaymentSession).filter(PaymentSession.status == PaymentStatus.EXPIRED).count()
+    return {"status": "healthy", **stats}
+
+
+@router.get("/rate-limits")
+async def rate_limit_usage(
+    scope: Optional[str] = None,
+    limit: int = 50,
+    current_user: dict = Depends(require_admin)
+):
+    """
+    Per-bucket request counts from the rate limiter (admin only).
     
+    ``scope`` filters by "ip", "api_key" or "merchant". API keys are shown
+    by their public prefix. Counts are per API worker.
+    """
     return {
-        "status": "healthy",
-        "merchants": {
-            "total": total_merchants,
-            "active": active_merchants,
-            "inactive": total_merchants - active_merchants
-        },
-        "payments": {
-            "total": total_sessions,
-            "paid": paid_sessions,
-            "pending": pending_sessions,
-            "expired": expired_sessions
-        }
+        "backend": settings.RATE_LIMIT_BACKEND,
+        "enabled": settings.RATE_LIMIT_ENABLED,
+        "buckets": rate_limit.usage.top(limit=limit, scope=scope)
     }
+
+
+@router.get("/session-reads")
+async def session_read_metrics(current_user: dict = Depends(require_admin)):
+    """
+    Session status cache and read coalescing counters (admin only).
+    
+    ``loads_coalesced`` counts reads that joined a concurrent load of the
+    same session instead of querying the database. Counts are per API worker.
+    """
+    return session_read_stats()
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.core import get_db, require_admin
 from app.models import PaymentSession, PaymentStatus
 from app.services.webhook_service import send_webhook
+from app.services.lookups import get_merchant_by_id
 
 router = APIRouter(prefix="/admin/webhooks", tags=["Admin - Webhooks"])
 
@@ -56,7 +57,7 @@ async def test_webhook(
     from app.models import Merchant
     import httpx
     
-    merchant = db.query(Merchant).filter(Merchant.id == merchant_id).first()
+    merchant = get_merchant_by_id(db, merchant_id)
     
     if not merchant:
         raise HTTPException(
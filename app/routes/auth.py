@@ -1,16 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-import secrets
-from app.core import get_db, hash_password, verify_password, create_access_token
+from app.core import get_db, hash_password_async, verify_password_async, create_access_token
+from app.core.auth import issue_api_key
 from app.models import Merchant, Admin
 from app.schemas import MerchantRegister, MerchantLogin, TokenResponse
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-def generate_api_key() -> str:
-    """Generate a secure API key for merchant."""
-    return f"pk_live_{secrets.token_urlsafe(32)}"
+async def _hash_password(db: Session, password: str) -> str:
+    """Hash a password, returning the DB connection to the pool while bcrypt runs."""
+    db.rollback()
+    return await hash_password_async(password)
+
+
+async def _check_password(db: Session, plain_password: str, hashed_password: str) -> bool:
+    """Verify a password, returning the DB connection to the pool while bcrypt runs."""
+    db.rollback()
+    return await verify_password_async(plain_password, hashed_password)
 
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
@@ -31,9 +38,9 @@ async def register_merchant(
     new_merchant = Merchant(
         name=merchant_data.name,
         email=merchant_data.email,
-        password_hash=hash_password(merchant_data.password),
-        api_key=generate_api_key(),  # Auto-generate API key on registration
+        password_hash=await _hash_password(db, merchant_data.password),
     )
+    api_key = issue_api_key(new_merchant)  # Auto-generate API key on registration
     
     db.add(new_merchant)
     db.commit()
@@ -46,7 +53,7 @@ async def register_merchant(
     
     return TokenResponse(
         access_token=access_token,
-        api_key=new_merchant.api_key
+        api_key=api_key
     )
 
 
@@ -58,7 +65,7 @@ async def login_merchant(
     """Login as a merchant or admin."""
     # First check if it's an admin
     admin = db.query(Admin).filter(Admin.email == credentials.email).first()
-    if admin and verify_password(credentials.password, admin.password_hash):
+    if admin and await _check_password(db, credentials.password, admin.password_hash):
         # Generate admin JWT token
         access_token = create_access_token(
             data={"sub": str(admin.id), "role": "admin"}
@@ -71,7 +78,7 @@ async def login_merchant(
     # Otherwise, check merchant
     merchant = db.query(Merchant).filter(Merchant.email == credentials.email).first()
     
-    if not merchant or not verify_password(credentials.password, merchant.password_hash):
+    if not merchant or not await _check_password(db, credentials.password, merchant.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -83,11 +90,12 @@ async def login_merchant(
             detail="Account is disabled"
         )
     
-    # Generate API key if merchant doesn't have one (backward compatibility)
-    if not merchant.api_key:
-        merchant.api_key = generate_api_key()
+    # Generate API key if merchant doesn't have one (backward compatibility).
+    # Hashed keys cannot be returned again; use POST /merchant/api-key to rotate.
+    api_key = merchant.api_key
+    if not api_key and not merchant.api_key_hash:
+        api_key = issue_api_key(merchant)
         db.commit()
-        db.refresh(merchant)
     
     # Generate JWT token
     access_token = create_access_token(
@@ -96,5 +104,5 @@ async def login_merchant(
     
     return TokenResponse(
         access_token=access_token,
-        api_key=merchant.api_key
+        api_key=api_key
     )
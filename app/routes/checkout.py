@@ -1,48 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
+from fastapi import APIRouter, Header, HTTPException, status, Response, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from app.core import get_db
-from app.core.config import settings
-from app.models import PaymentSession, PaymentStatus
+from typing import Optional
+import uuid
+from app.models import PaymentStatus
 from app.schemas import PaymentSessionDetail
-from stellar_sdk import Keypair
 from app.services.soroban_validator import validator_service
-import qrcode
-import io
-import base64
+from app.services.payment_utils import effective_status, is_session_expired
+from app.services.checkout_render import (
+    EXPIRED_PAGE,
+    PAID_PAGE,
+    get_checkout_context,
+    render_checkout_page,
+)
+from app.services.qr_service import render_qr
+from app.services.session_cache import read_session_snapshot
+from app.services.session_polling import etag_matches, not_modified, session_etag, status_cache_headers
 import logging
 
 router = APIRouter(prefix="/checkout", tags=["Checkout"])
-templates = Jinja2Templates(directory="app/templates")
 logger = logging.getLogger(__name__)
 
 
-def generate_qr_code(data: str) -> str:
-    """Generate QR code and return as base64 encoded image."""
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to base64
-    buffered = io.BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    
-    return f"data:image/png;base64,{img_str}"
-
-
 @router.get("/{session_id}", response_class=HTMLResponse)
-async def checkout_page(
-    request: Request,
-    session_id: str,
-    db: Session = Depends(get_db)
-):
-    """Display hosted checkout page."""
-    session = db.query(PaymentSession).filter(PaymentSession.id == session_id).first()
+async def checkout_page(session_id: str):
+    """
+    Display hosted checkout page.
+    
+    The merchant part of the page (validated address, QR, template) is
+    precompiled and cached per merchant; only session fields render here.
+    """
+    session = await read_session_snapshot(session_id)
     
     if not session:
         raise HTTPException(
@@ -52,176 +39,108 @@ async def checkout_page(
     
     # Check if already paid
     if session.status == PaymentStatus.PAID:
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Payment Complete</title>
-            <meta http-equiv="refresh" content="2;url={session.success_url}">
-        </head>
-        <body style="font-family: Arial; text-align: center; padding: 50px;">
-            <h1>✅ Payment Complete!</h1>
-            <p>Redirecting to merchant...</p>
-        </body>
-        </html>
-        """
-    
-    # Check if expired
-    expiry_time = session.created_at + timedelta(minutes=settings.PAYMENT_EXPIRY_MINUTES)
-    if datetime.utcnow() > expiry_time:
-        session.status = PaymentStatus.EXPIRED
-        db.commit()
-        
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Payment Expired</title>
-            <meta http-equiv="refresh" content="2;url={session.cancel_url}">
-        </head>
-        <body style="font-family: Arial; text-align: center; padding: 50px;">
-            <h1>⏰ Payment Expired</h1>
-            <p>This payment session has expired. Redirecting...</p>
-        </body>
-        </html>
-        """
-    
-    # Generate payment instruction
-    merchant_address = session.merchant.stellar_address
+        return HTMLResponse(content=PAID_PAGE.render(success_url=session.success_url))
+    
+    # Check if expired (persisted by the background sweeper)
+    if is_session_expired(session):
+        return HTMLResponse(content=EXPIRED_PAGE.render(cancel_url=session.cancel_url))
+    
+    context = await get_checkout_context(session.merchant_id)
+    if context is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment session not found"
+        )
+    
+    # Missing or invalid merchant Stellar address
+    if context.error_page:
+        return HTMLResponse(content=context.error_page, status_code=500)
     
     # IMPORTANT: Payments go to merchant address (not contract)
     # Contract is used for validation only
-    payment_address = merchant_address
-    
-    # Check if smart contract is available for validation
-    contract_address = validator_service.get_contract_address()
-    use_smart_contract = bool(contract_address)
-    
-    # Debug log
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Merchant ID: {session.merchant.id}")
-    logger.info(f"Merchant Email: {session.merchant.email}")
-    logger.info(f"Merchant Stellar Address: {merchant_address}")
-    logger.info(f"Smart Contract (Validator): {contract_address}")
-    logger.info(f"Payment Address (QR): {payment_address}")
-    logger.info(f"Smart Contract Validation: {'ENABLED' if use_smart_contract else 'DISABLED'}")
-    
-    # Validate payment address
-    if not payment_address:
-        return HTMLResponse(content="""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Configuration Error</title>
-        </head>
-        <body style="font-family: Arial; text-align: center; padding: 50px;">
-            <h1>⚠️ Configuration Error</h1>
-            <p>Merchant has not configured their Stellar wallet address.</p>
-            <p>Please contact the merchant to complete their setup.</p>
-        </body>
-        </html>
-        """, status_code=500)
-    
-    # Validate address format
-    try:
-        Keypair.from_public_key(merchant_address)
-    except Exception as e:
-        return HTMLResponse(content=f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Configuration Error</title>
-        </head>
-        <body style="font-family: Arial; text-align: center; padding: 50px;">
-            <h1>⚠️ Invalid Stellar Address</h1>
-            <p>Merchant's Stellar address is invalid: {merchant_address}</p>
-            <p>Error: {str(e)}</p>
-            <p>Please contact the merchant to fix their configuration.</p>
-        </body>
-        </html>
-        """, status_code=500)
-    
-    payment_memo = session_id
-    amount_usdc = session.amount_usdc
-    
-    # Calculate XLM equivalent (assuming 1 USDC ≈ 10 XLM for display, adjust based on market rate)
-    # In production, fetch real-time XLM/USD rate from an API
-    amount_xlm = str(float(amount_usdc) * 10)  # Placeholder conversion
-    
-    # Generate QR codes with just the address (most wallets only support address QR)
-    # Users will need to manually enter amount and memo
-    
-    # Generate Address QR code (compatible with all wallets)
-    qr_address = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr_address.add_data(payment_address)
-    qr_address.make(fit=True)
-    img_address = qr_address.make_image(fill_color="black", back_color="white")
-    buffered_address = io.BytesIO()
-    img_address.save(buffered_address, format="PNG")
-    qr_code_address_b64 = base64.b64encode(buffered_address.getvalue()).decode()
-    
-    # Payment URIs for "Open in Wallet" buttons (may not work in all wallets)
-    usdc_uri = (
-        f"stellar:{payment_address}?"
-        f"amount={amount_usdc}&"
-        f"memo={payment_memo}&"
-        f"memo_type=MEMO_TEXT&"
-        f"asset_code={settings.USDC_ASSET_CODE}&"
-        f"asset_issuer={settings.USDC_ASSET_ISSUER}"
+    logger.debug(
+        f"Checkout {session_id}: merchant {context.merchant_id}, address {context.stellar_address}, "
+        f"contract validation {'ENABLED' if validator_service.get_contract_address() else 'DISABLED'}"
     )
     
-    xlm_uri = (
-        f"stellar:{payment_address}?"
-        f"amount={amount_xlm}&"
-        f"memo={payment_memo}&"
-        f"memo_type=MEMO_TEXT"
-    )
+    return HTMLResponse(content=render_checkout_page(context, session))
+
+
+@router.get("/qr/{merchant_id}/{digest}")
+async def checkout_qr_image(
+    request: Request,
+    merchant_id: uuid.UUID,
+    digest: str
+):
+    """
+    QR code image of a merchant's payment address.
+    
+    The URL names the image's content hash, so it is the same for every
+    session of the merchant and cacheable forever. A digest that is not the
+    merchant's current address gets 404; matching If-None-Match requests
+    get 304.
+    """
+    context = await get_checkout_context(merchant_id)
     
-    # Render template
-    return templates.TemplateResponse("checkout.html", {
-        "request": request,
-        "session_id": session_id,
-        "merchant_name": session.merchant.name,
-        "amount_fiat": str(session.amount_fiat),
-        "fiat_currency": session.fiat_currency,
-        "amount_usdc": amount_usdc,
-        "amount_xlm": amount_xlm,
-        "stellar_address": payment_address,
-        "use_smart_contract": use_smart_contract,
-        "qr_code_address": qr_code_address_b64,
-        "payment_memo": payment_memo,
-        "usdc_asset_code": settings.USDC_ASSET_CODE,
-        "usdc_asset_issuer": settings.USDC_ASSET_ISSUER,
-        "usdc_uri": usdc_uri,
-        "xlm_uri": xlm_uri,
-        "success_url": session.success_url,
-        "cancel_url": session.cancel_url
-    })
+    if not context or not context.qr_digest or context.qr_digest != digest:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="QR code not found"
+        )
+    
+    address = context.stellar_address
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    image = render_qr(address)
+    return Response(content=image.content, media_type=image.media_type, headers=headers)
 
 
-@router.get("/api/{session_id}", response_model=PaymentSessionDetail)
+@router.get("/api/{session_id}", response_model=PaymentSessionDetail, response_model_exclude_none=True)
 async def get_checkout_details(
     session_id: str,
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get checkout details as JSON (for frontend integration)."""
-    session = db.query(PaymentSession).filter(PaymentSession.id == session_id).first()
-    
-    if not session:
+    """
+    Get checkout details as JSON (for frontend integration).
+    
+    Served from the session status cache and the merchant's cached checkout
+    context; a miss costs one projected query for the session and merchant
+    name. Null fields are omitted. Send the ETag back in If-None-Match to
+    get 304 while nothing has changed.
+    """
+    session = await read_session_snapshot(session_id)
+    context = await get_checkout_context(session.merchant_id) if session else None
+    
+    if not context:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Payment session not found"
         )
     
+    # Also tag the merchant name and address in the body, so a rename or new address is sent
+    etag = session_etag(session, context.fingerprint)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(status_cache_headers(etag))
+    
+    # Expiry is persisted by the background sweeper; report it as soon as it is due
     return PaymentSessionDetail(
         id=session.id,
-        merchant_name=session.merchant.name,
-        merchant_stellar_address=session.merchant.stellar_address,
+        merchant_name=context.name,
+        merchant_stellar_address=context.stellar_address,
         amount_fiat=session.amount_fiat,
         fiat_currency=session.fiat_currency,
         amount_usdc=session.amount_usdc,
-        status=session.status.value,
+        status=effective_status(session).value,
         success_url=session.success_url,
         cancel_url=session.cancel_url,
         tx_hash=session.tx_hash,
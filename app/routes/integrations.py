@@ -2,14 +2,20 @@
 E-commerce Platform Integration Endpoints
 Easy integration for Shopify, WooCommerce, and other platforms
 """
-from fastapi import APIRouter, HTTPException, Request, Depends
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, Depends
+from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 from typing import Optional
+from app.core.config import settings
 from app.core.database import get_db
-from app.models import Merchant, PaymentSession
+from app.models import PaymentSession, PaymentStatus
+from app.core.auth import get_merchant_principal
+from app.core.rate_limit import enforce_api_key_limit
+from app.services.payment_utils import effective_status
+from app.services.session_cache import cache_session, read_session_snapshot
+from app.services.session_idempotency import commit_new_session, find_original_session, mark_replayed
+from app.services.session_polling import etag_matches, not_modified, session_etag, status_cache_headers, wait_for_session_change
 from sqlalchemy.orm import Session
-import secrets
 
 router = APIRouter(prefix="/integrations", tags=["E-commerce Integrations"])
 
@@ -29,6 +35,8 @@ class SimplePaymentRequest(BaseModel):
 @router.post("/create-checkout")
 async def create_simple_checkout(
     request: SimplePaymentRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     db: Session = Depends(get_db)
 ):
     """
@@ -52,9 +60,13 @@ async def create_simple_checkout(
         "checkout_url": "https://chainpe.onrender.com/checkout/pay_xxx",
         "session_id": "pay_xxx"
     }
+    
+    Retrying with the same order_id (or ``Idempotency-Key`` header) returns
+    the original session instead of creating another one.
     """
     # Verify API key
-    merchant = db.query(Merchant).filter(Merchant.api_key == request.api_key).first()
+    await enforce_api_key_limit(request.api_key)
+    merchant = get_merchant_principal(db, request.api_key)
     if not merchant:
         raise HTTPException(status_code=401, detail="Invalid API key")
     
@@ -63,17 +75,23 @@ async def create_simple_checkout(
     from app.core.config import settings
     from app.models import PaymentStatus
     from datetime import datetime, timedelta
-    from app.services.payment_utils import generate_session_id
+    from app.services.payment_utils import generate_session_id, calculate_expiry
     from app.services.soroban_validator import validator_service
+    from app.services.payment_rollups import record_session_created
     import logging
     
     logger = logging.getLogger(__name__)
     
-    session_id = generate_session_id()
-    
     # Calculate USDC amount (assuming 1:1 for USD)
     amount_usdc = str(float(request.amount))
     
+    original = find_original_session(db, merchant.id, request.order_id, idempotency_key, amount_usdc)
+    if original is not None:
+        mark_replayed(response)
+        return _checkout_response(original)
+    
+    session_id = generate_session_id()
+    
     # Generate payment memo
     memo = session_id
     
@@ -85,19 +103,31 @@ async def create_simple_checkout(
         amount_usdc=amount_usdc,
         status=PaymentStatus.CREATED,
         success_url=request.success_url,
-        cancel_url=request.cancel_url
+        cancel_url=request.cancel_url,
+        expires_at=calculate_expiry(),
+        order_id=request.order_id,
+        idempotency_key=idempotency_key
     )
     
     db.add(new_session)
-    db.commit()
+    record_session_created(db, new_session)
+    session = commit_new_session(db, new_session)
+    if session is not new_session:
+        # A concurrent retry created it first
+        mark_replayed(response)
+        return _checkout_response(session)
     db.refresh(new_session)
+    cache_session(new_session, merchant.name)
     
-    checkout_url = f"{settings.APP_BASE_URL}/checkout/{session_id}"
-    
+    return _checkout_response(new_session)
+
+
+def _checkout_response(session: PaymentSession) -> dict:
+    session_status = effective_status(session)
     return {
-        "checkout_url": checkout_url,
-        "session_id": session_id,
-        "status": "pending"
+        "checkout_url": f"{settings.APP_BASE_URL}/checkout/{session.id}",
+        "session_id": session.id,
+        "status": "pending" if session_status == PaymentStatus.CREATED else session_status.value
     }
 
 
@@ -150,6 +180,9 @@ async def get_payment_button(api_key: str):
 async def verify_payment_status(
     session_id: str,
     api_key: str,
+    response: Response,
+    wait: int = Query(0, ge=0, description="Seconds to hold the request until the status changes"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
@@ -157,32 +190,39 @@ async def verify_payment_status(
     
     Usage:
     GET /integrations/verify/pay_xxx?api_key=YOUR_API_KEY
+    GET /integrations/verify/pay_xxx?api_key=YOUR_API_KEY&wait=30  (long-poll)
     
-    Returns payment status and details
+    Returns payment status and details. Send the ETag back in
+    If-None-Match to get 304 while the status is unchanged.
     """
     # Verify API key
-    merchant = db.query(Merchant).filter(Merchant.api_key == api_key).first()
+    merchant = get_merchant_principal(db, api_key)
     if not merchant:
         raise HTTPException(status_code=401, detail="Invalid API key")
     
     # Get session
-    session = db.query(PaymentSession).filter(
-        PaymentSession.session_id == session_id,
-        PaymentSession.merchant_id == merchant.id
-    ).first()
+    session = await read_session_snapshot(session_id)
     
-    if not session:
+    if not session or session.merchant_id != merchant.id:
         raise HTTPException(status_code=404, detail="Payment session not found")
     
+    session = await wait_for_session_change(db, session, if_none_match, wait)
+    etag = session_etag(session)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(status_cache_headers(etag))
+    
+    status = effective_status(session)
     return {
-        "session_id": session.session_id,
-        "status": session.status.value,
+        "session_id": session.id,
+        "order_id": session.order_id,
+        "status": status.value,
         "amount": str(session.amount_fiat),
         "currency": session.fiat_currency,
-        "paid_amount": str(session.paid_amount) if session.paid_amount else None,
-        "paid_asset": session.paid_asset,
-        "transaction_hash": session.transaction_hash,
-        "metadata": session.metadata,
+        "paid_amount": session.amount_usdc if status == PaymentStatus.PAID else None,
+        "paid_asset": "USDC" if status == PaymentStatus.PAID else None,
+        "transaction_hash": session.tx_hash,
+        "metadata": {},
         "created_at": session.created_at.isoformat(),
         "paid_at": session.paid_at.isoformat() if session.paid_at else None
     }
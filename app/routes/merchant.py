@@ -2,7 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core import get_db, require_merchant
 from app.models import Merchant
-from app.schemas import MerchantProfileUpdate, MerchantProfile
+from app.schemas import MerchantProfileUpdate, MerchantProfile, ApiKeyResponse
+from app.core.auth import invalidate_merchant_principal, issue_api_key
+from app.services.checkout_render import invalidate_checkout_context
+from app.services.lookups import get_merchant_by_id
 
 router = APIRouter(prefix="/merchant", tags=["Merchant"])
 
@@ -13,7 +16,11 @@ async def get_merchant_profile(
     db: Session = Depends(get_db)
 ):
     """Get merchant profile."""
-    merchant = db.query(Merchant).filter(Merchant.id == current_user["id"]).first()
+    # Loaded with the token principal and evicted on profile changes
+    if current_user.get("profile"):
+        return MerchantProfile(**current_user["profile"])
+    
+    merchant = get_merchant_by_id(db, current_user["id"])
     
     if not merchant:
         raise HTTPException(
@@ -28,7 +35,8 @@ async def get_merchant_profile(
         stellar_address=merchant.stellar_address,
         webhook_url=merchant.webhook_url,
         is_active=merchant.is_active,
-        created_at=merchant.created_at
+        created_at=merchant.created_at,
+        api_key_prefix=merchant.api_key_prefix
     )
 
 
@@ -39,7 +47,7 @@ async def update_merchant_profile(
     db: Session = Depends(get_db)
 ):
     """Update merchant profile (Stellar address and webhook URL)."""
-    merchant = db.query(Merchant).filter(Merchant.id == current_user["id"]).first()
+    merchant = get_merchant_by_id(db, current_user["id"])
     
     if not merchant:
         raise HTTPException(
@@ -55,6 +63,8 @@ async def update_merchant_profile(
         merchant.webhook_url = str(profile_update.webhook_url)
     
     db.commit()
+    invalidate_merchant_principal(merchant.id)
+    invalidate_checkout_context(merchant.id)
     db.refresh(merchant)
     
     return MerchantProfile(
@@ -64,5 +74,35 @@ async def update_merchant_profile(
         stellar_address=merchant.stellar_address,
         webhook_url=merchant.webhook_url,
         is_active=merchant.is_active,
-        created_at=merchant.created_at
+        created_at=merchant.created_at,
+        api_key_prefix=merchant.api_key_prefix
+    )
+
+
+@router.post("/api-key", response_model=ApiKeyResponse)
+async def rotate_api_key(
+    current_user: dict = Depends(require_merchant),
+    db: Session = Depends(get_db)
+):
+    """
+    Issue a new API key, revoking the current one.
+    
+    API keys are stored hashed, so this is the only time the new key is
+    returned. Store it securely.
+    """
+    merchant = get_merchant_by_id(db, current_user["id"])
+    
+    if not merchant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Merchant not found"
+        )
+    
+    api_key = issue_api_key(merchant)
+    db.commit()
+    invalidate_merchant_principal(merchant.id)
+    
+    return ApiKeyResponse(
+        api_key=api_key,
+        api_key_prefix=merchant.api_key_prefix
     )
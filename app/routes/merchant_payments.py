@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime, timedelta
-from app.core import get_db, require_merchant
-from app.models import Merchant, PaymentSession, PaymentStatus
-from app.schemas import PaymentSessionStatus, PaymentListItem
-from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+from app.core import get_db, get_read_db, require_merchant
+from app.core.config import settings
+from app.models import Merchant, PaymentSession, PaymentSessionArchive, PaymentStatus
+from app.schemas import PaymentSessionStatus, PaymentListItem, PaymentTimeSeries
+from app.services.payment_rollups import get_rollup_totals, transition_session
+from app.services.payment_timeseries import get_time_series, hourly_window_start
 
 router = APIRouter(prefix="/merchant/payments", tags=["Merchant Payments"])
 
@@ -13,7 +15,7 @@ router = APIRouter(prefix="/merchant/payments", tags=["Merchant Payments"])
 @router.get("", response_model=List[PaymentListItem])
 async def get_my_payment_sessions(
     current_user: dict = Depends(require_merchant),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     status: Optional[str] = Query(None, description="Filter by status: created, paid, expired"),
     limit: int = Query(50, le=100, description="Number of results to return"),
     offset: int = Query(0, description="Number of results to skip")
@@ -55,55 +57,30 @@ async def get_my_payment_sessions(
 @router.get("/stats")
 async def get_payment_stats(
     current_user: dict = Depends(require_merchant),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get payment statistics for the authenticated merchant."""
     merchant_id = current_user["id"]
     
-    # Total sessions
-    total_sessions = db.query(PaymentSession).filter(
-        PaymentSession.merchant_id == merchant_id
-    ).count()
-    
-    # Sessions by status
-    paid_count = db.query(PaymentSession).filter(
-        PaymentSession.merchant_id == merchant_id,
-        PaymentSession.status == PaymentStatus.PAID
-    ).count()
-    
-    pending_count = db.query(PaymentSession).filter(
-        PaymentSession.merchant_id == merchant_id,
-        PaymentSession.status == PaymentStatus.CREATED
-    ).count()
-    
-    expired_count = db.query(PaymentSession).filter(
-        PaymentSession.merchant_id == merchant_id,
-        PaymentSession.status == PaymentStatus.EXPIRED
-    ).count()
-    
-    # Total revenue (sum of paid sessions)
-    paid_sessions = db.query(PaymentSession).filter(
-        PaymentSession.merchant_id == merchant_id,
-        PaymentSession.status == PaymentStatus.PAID
-    ).all()
-    
-    total_usdc = sum(Decimal(session.amount_usdc) for session in paid_sessions)
-    
-    # Today's stats
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_paid = db.query(PaymentSession).filter(
-        PaymentSession.merchant_id == merchant_id,
-        PaymentSession.status == PaymentStatus.PAID,
-        PaymentSession.paid_at >= today_start
-    ).count()
-    
-    # This week's stats
-    week_start = datetime.utcnow() - timedelta(days=7)
-    week_paid = db.query(PaymentSession).filter(
-        PaymentSession.merchant_id == merchant_id,
-        PaymentSession.status == PaymentStatus.PAID,
-        PaymentSession.paid_at >= week_start
-    ).count()
+    today = datetime.utcnow().date()
+    week_start = today - timedelta(days=7)
+    
+    # Served from the per-day rollups: cost grows with days of history,
+    # not with the number of sessions
+    totals = get_rollup_totals(
+        db,
+        merchant_id=merchant_id,
+        windows={"today": today, "this_week": week_start}
+    )
+    paid = totals[PaymentStatus.PAID]
+    
+    paid_count = paid["count"]
+    pending_count = totals[PaymentStatus.CREATED]["count"]
+    expired_count = totals[PaymentStatus.EXPIRED]["count"]
+    total_sessions = paid_count + pending_count + expired_count
+    total_usdc = paid["amount_usdc"]
+    today_paid = paid["today"]
+    week_paid = paid["this_week"]
     
     # Success rate
     success_rate = (paid_count / total_sessions * 100) if total_sessions > 0 else 0
@@ -127,10 +104,62 @@ async def get_payment_stats(
     }
 
 
+@router.get("/timeseries", response_model=PaymentTimeSeries)
+async def get_payment_timeseries(
+    current_user: dict = Depends(require_merchant),
+    db: Session = Depends(get_read_db),
+    granularity: str = Query("day", description="Bucket size: hour or day"),
+    start: Optional[datetime] = Query(None, description="Range start (UTC), defaults to 24 hours (hour) or 30 days (day) ago"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC), defaults to now")
+):
+    """Get bucketed session counts, revenue and conversion rate for charts."""
+    if granularity not in ("hour", "day"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid granularity. Must be one of: hour, day"
+        )
+    
+    # Timestamps with an offset are compared with naive UTC bucket times
+    if end is not None and end.tzinfo is not None:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    if start is not None and start.tzinfo is not None:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=1 if granularity == "hour" else 30)
+    
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    
+    if granularity == "hour" and start < hourly_window_start():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Hourly data is only kept for the last {settings.STATS_HOURLY_RETENTION_DAYS} days"
+        )
+    
+    if end - start > timedelta(days=731):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Range cannot exceed two years"
+        )
+    
+    buckets = get_time_series(db, current_user["id"], start, end, granularity)
+    
+    return PaymentTimeSeries(
+        granularity=granularity,
+        start=start,
+        end=end,
+        buckets=buckets
+    )
+
+
 @router.get("/recent", response_model=List[PaymentListItem])
 async def get_recent_payments(
     current_user: dict = Depends(require_merchant),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = Query(10, le=50, description="Number of recent payments to return")
 ):
     """Get recent payment sessions for the authenticated merchant."""
@@ -161,7 +190,7 @@ async def get_recent_payments(
 async def get_payment_session_detail(
     session_id: str,
     current_user: dict = Depends(require_merchant),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get detailed information about a specific payment session."""
     session = db.query(PaymentSession).filter(
@@ -169,6 +198,13 @@ async def get_payment_session_detail(
         PaymentSession.merchant_id == current_user["id"]
     ).first()
     
+    if not session:
+        # Old closed sessions are moved to the archive table
+        session = db.query(PaymentSessionArchive).filter(
+            PaymentSessionArchive.id == session_id,
+            PaymentSessionArchive.merchant_id == current_user["id"]
+        ).first()
+    
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -215,7 +251,11 @@ async def cancel_payment_session(
             detail="Session is already expired"
         )
     
-    session.status = PaymentStatus.EXPIRED
+    if not transition_session(db, session, PaymentStatus.EXPIRED):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Session status changed to {session.status.value}; not cancelled"
+        )
     db.commit()
     
     return {
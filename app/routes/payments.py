@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from typing import Optional
 from app.core import get_db, require_merchant
 from app.core.config import settings
 from app.models import Merchant, PaymentSession, PaymentStatus
 from app.schemas import PaymentSessionCreate, PaymentSessionResponse, PaymentSessionStatus
-from app.services.payment_utils import generate_session_id, convert_fiat_to_usdc
+from app.services.payment_utils import generate_session_id, convert_fiat_to_usdc, calculate_expiry, effective_status
+from app.services.payment_rollups import record_session_created
+from app.services.lookups import get_merchant_by_id
+from app.services.session_cache import cache_session, read_session_snapshot
+from app.services.session_polling import etag_matches, not_modified, session_etag, status_cache_headers, wait_for_session_change
 
 router = APIRouter(prefix="/v1/payment_sessions", tags=["Payment Sessions"])
 
@@ -18,7 +22,7 @@ async def create_payment_session(
 ):
     """Create a new payment session (merchant only)."""
     # Get merchant details
-    merchant = db.query(Merchant).filter(Merchant.id == current_user["id"]).first()
+    merchant = get_merchant_by_id(db, current_user["id"])
     
     if not merchant:
         raise HTTPException(
@@ -48,10 +52,13 @@ async def create_payment_session(
         status=PaymentStatus.CREATED,
         success_url=str(session_data.success_url),
         cancel_url=str(session_data.cancel_url),
+        expires_at=calculate_expiry(),
     )
     
     db.add(new_session)
+    record_session_created(db, new_session)
     db.commit()
+    cache_session(new_session, merchant.name)
     
     # Generate checkout URL
     checkout_url = f"{settings.APP_BASE_URL}/checkout/{session_id}"
@@ -65,10 +72,17 @@ async def create_payment_session(
 @router.get("/{session_id}", response_model=PaymentSessionStatus)
 async def get_payment_session_status(
     session_id: str,
+    response: Response,
+    wait: int = Query(0, ge=0, description="Seconds to hold the request until the status changes"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Get payment session status (public endpoint)."""
-    session = db.query(PaymentSession).filter(PaymentSession.id == session_id).first()
+    """
+    Get payment session status (public endpoint).
+    
+    Supports ``If-None-Match`` (304 while unchanged) and ``?wait=`` long-polling.
+    """
+    session = await read_session_snapshot(session_id)
     
     if not session:
         raise HTTPException(
@@ -76,17 +90,19 @@ async def get_payment_session_status(
             detail="Payment session not found"
         )
     
-    # Check if session has expired
-    expiry_time = session.created_at + timedelta(minutes=settings.PAYMENT_EXPIRY_MINUTES)
-    if session.status == PaymentStatus.CREATED and datetime.utcnow() > expiry_time:
-        session.status = PaymentStatus.EXPIRED
-        db.commit()
+    session = await wait_for_session_change(db, session, if_none_match, wait)
+    etag = session_etag(session)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(status_cache_headers(etag))
     
+    # Expiry is persisted by the background sweeper; report it as soon as it is due
     return PaymentSessionStatus(
         session_id=session.id,
-        status=session.status.value,
+        status=effective_status(session).value,
         amount_usdc=session.amount_usdc,
         tx_hash=session.tx_hash,
         created_at=session.created_at,
-        paid_at=session.paid_at
+        paid_at=session.paid_at,
+        expires_at=session.expires_at
     )
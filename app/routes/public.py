@@ -1,24 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from datetime import datetime, timedelta
+import asyncio
+import json
+import time
 from app.core import get_db
-from app.models import PaymentSession, PaymentStatus
-from app.schemas import PaymentSessionStatus
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import create_read_session
+from app.models import PaymentStatus
+from app.services.payment_rollups import get_rollup_totals
+from app.services.payment_utils import calculate_expiry, effective_status, is_session_expired
+from app.services.session_cache import read_session_snapshot
+from app.services.session_events import hub
+from app.services.session_polling import etag_matches, not_modified, session_etag, status_cache_headers, wait_for_session_change
 
 router = APIRouter(prefix="/public", tags=["Public"])
 
+stats_cache = TTLCache(maxsize=1, ttl=settings.STATS_CACHE_TTL_SECONDS)
+
 
 @router.get("/session/{session_id}/verify")
 async def verify_payment_session(
     session_id: str,
+    response: Response,
+    wait: int = Query(0, ge=0, description="Seconds to hold the request until the status changes"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
     Public endpoint to verify if a payment session exists and get minimal info.
     Useful for integrations to verify session validity.
+    
+    Supports ``If-None-Match`` (304 while unchanged) and ``?wait=`` long-polling.
     """
-    session = db.query(PaymentSession).filter(PaymentSession.id == session_id).first()
+    session = await read_session_snapshot(session_id)
     
     if not session:
         raise HTTPException(
@@ -26,50 +44,150 @@ async def verify_payment_session(
             detail="Payment session not found"
         )
     
-    # Check expiry
-    expiry_time = session.created_at + timedelta(minutes=15)
-    is_expired = datetime.utcnow() > expiry_time and session.status == PaymentStatus.CREATED
+    session = await wait_for_session_change(db, session, if_none_match, wait)
+    etag = session_etag(session)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(status_cache_headers(etag))
+    
+    # Pending sessions past their expiry that the sweeper has not reached yet
+    is_expired = session.status == PaymentStatus.CREATED and is_session_expired(session)
     
     return {
         "session_id": session.id,
         "exists": True,
         "status": session.status.value,
         "amount_usdc": session.amount_usdc,
-        "merchant_name": session.merchant.name,
+        "merchant_name": session.merchant_name,
         "is_expired": is_expired,
         "created_at": session.created_at
     }
 
 
-@router.get("/stats")
-async def get_public_stats(db: Session = Depends(get_db)):
-    """Get public gateway statistics (no authentication required)."""
-    from app.models import Merchant
+def _status_event(session_id: str, status_value: str) -> str:
+    data = json.dumps({"session_id": session_id, "status": status_value})
+    return f"event: status\ndata: {data}\n\n"
+
+
+async def _session_event_stream(request: Request, session_id: str) -> AsyncIterator[str]:
+    """
+    Yield SSE messages until the session is paid/expired or the stream times out.
+    
+    The subscription is made here rather than in the route, so a response
+    that never starts streaming (the client left first) leaves none behind.
+    """
+    # Subscribe before reading so a change in between is not missed
+    queue = hub.subscribe(session_id)
+    try:
+        session = await read_session_snapshot(session_id)
+        if session is None:
+            return
+        current = effective_status(session).value
+        expires_at = session.expires_at or calculate_expiry(session.created_at)
+
+        yield "retry: 3000\n\n"
+        yield _status_event(session_id, current)
+
+        started = time.monotonic()
+        while current == PaymentStatus.CREATED.value:
+            remaining = settings.SESSION_EVENTS_MAX_STREAM_SECONDS - (time.monotonic() - started)
+            until_expiry = (expires_at - datetime.utcnow()).total_seconds()
+            if remaining <= 0:
+                break
+            if until_expiry <= 0:
+                current = PaymentStatus.EXPIRED.value
+                yield _status_event(session_id, current)
+                break
+
+            try:
+                new_status = await asyncio.wait_for(
+                    queue.get(),
+                    timeout=min(settings.SESSION_EVENTS_KEEPALIVE_SECONDS, remaining, until_expiry)
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+
+            if new_status != current:
+                current = new_status
+                yield _status_event(session_id, current)
+    finally:
+        hub.unsubscribe(session_id, queue)
+
+
+@router.get("/session/{session_id}/events")
+async def stream_session_events(session_id: str, request: Request):
+    """
+    Stream a payment session's status as Server-Sent Events.
     
-    total_sessions = db.query(PaymentSession).count()
-    paid_sessions = db.query(PaymentSession).filter(
-        PaymentSession.status == PaymentStatus.PAID
-    ).count()
+    Sends the current status immediately, then one ``status`` event per
+    change. The stream closes once the session is paid or expired; pending
+    sessions get a keepalive comment every SESSION_EVENTS_KEEPALIVE_SECONDS.
+    No database connection is held while the stream is open.
+    """
+    if await read_session_snapshot(session_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment session not found"
+        )
+
+    return StreamingResponse(
+        _session_event_stream(request, session_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        }
+    )
+
+
+def _compute_public_stats() -> dict:
+    """Compute gateway-wide statistics in a dedicated read session."""
+    from app.models import Merchant
     
-    active_merchants = db.query(Merchant).filter(
-        Merchant.is_active == True
-    ).count()
+    db = create_read_session()
+    try:
+        totals = get_rollup_totals(
+            db,
+            windows={"last_24h": (datetime.utcnow() - timedelta(hours=24)).date()}
+        )
+        paid = totals[PaymentStatus.PAID]
+        
+        active_merchants = db.query(Merchant).filter(
+            Merchant.is_active == True
+        ).count()
+        
+        return {
+            "total_transactions": sum(entry["count"] for entry in totals.values()),
+            "successful_payments": paid["count"],
+            "active_merchants": active_merchants,
+            # Rollups are per day, so this covers payments since the start of
+            # yesterday (UTC) rather than an exact rolling 24 hours
+            "last_24h_payments": paid["last_24h"]
+        }
+    finally:
+        db.close()
+
+
+@router.get("/stats")
+async def get_public_stats():
+    """
+    Get public gateway statistics (no authentication required).
     
-    # Last 24 hours stats
-    yesterday = datetime.utcnow() - timedelta(hours=24)
-    recent_paid = db.query(PaymentSession).filter(
-        PaymentSession.status == PaymentStatus.PAID,
-        PaymentSession.paid_at >= yesterday
-    ).count()
+    Figures are cached for STATS_CACHE_TTL_SECONDS; concurrent requests on a
+    cold cache share a single computation, so traffic on this endpoint
+    cannot multiply database load.
+    """
+    stats = await stats_cache.get_or_load_async(
+        "public",
+        lambda: asyncio.to_thread(_compute_public_stats)
+    )
     
     return {
         "gateway": "Stellar Payment Gateway",
         "network": "testnet",
-        "stats": {
-            "total_transactions": total_sessions,
-            "successful_payments": paid_sessions,
-            "active_merchants": active_merchants,
-            "last_24h_payments": recent_paid
-        },
+        "stats": stats,
         "status": "operational"
     }
@@ -1,23 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
 from app.core import get_db
 from app.core.config import settings
 from app.models import Merchant, PaymentSession, PaymentStatus
-from app.schemas import PaymentSessionCreate, PaymentSessionResponse, PaymentSessionStatus
-from app.services.payment_utils import generate_session_id, convert_fiat_to_usdc
-from app.core.auth import get_api_key
+from app.schemas import (
+    PaymentSessionBatchCreate,
+    PaymentSessionBatchResponse,
+    PaymentSessionCreate,
+    PaymentSessionResponse,
+    PaymentSessionStatus,
+)
+from app.services.payment_utils import generate_session_id, convert_fiat_to_usdc, calculate_expiry, effective_status
+from app.core.auth import get_api_key, get_merchant_principal
 from app.services.soroban_validator import validator_service
+from app.services.payment_rollups import record_session_created
+from app.services.session_batch import create_batch, register_sessions
+from app.services.session_idempotency import commit_new_session, find_original_session, mark_replayed
+from app.services.session_cache import cache_session, read_session_snapshot
+from app.services.session_polling import etag_matches, not_modified, session_etag, status_cache_headers, wait_for_session_change
 import logging
 
 router = APIRouter(prefix="/api/sessions", tags=["Payment Sessions - Public API"])
 logger = logging.getLogger(__name__)
 
 
+def _session_response(session: PaymentSession) -> PaymentSessionResponse:
+    return PaymentSessionResponse(
+        session_id=session.id,
+        checkout_url=f"{settings.APP_URL}/checkout/{session.id}",
+        amount_usdc=session.amount_usdc,
+        order_id=session.order_id,
+        expires_at=session.expires_at,
+        status=effective_status(session).value,
+        success_url=session.success_url,
+        cancel_url=session.cancel_url
+    )
+
+
 @router.post("/create", response_model=PaymentSessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_payment_session_public(
     session_data: PaymentSessionCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     api_key: str = Depends(get_api_key),
     db: Session = Depends(get_db)
 ):
@@ -42,9 +69,14 @@ async def create_payment_session_public(
     ```
     
     Response includes checkout_url to redirect customer to.
+    
+    Retries are safe: a request with the same ``Idempotency-Key`` header, or
+    without one the same ``order_id``, returns the session the first attempt
+    created with ``200`` and ``Idempotent-Replayed: true``. Reusing an
+    order_id with a different amount is rejected with ``409``.
     """
     # Get merchant from API key
-    merchant = db.query(Merchant).filter(Merchant.api_key == api_key).first()
+    merchant = get_merchant_principal(db, api_key)
     
     if not merchant:
         raise HTTPException(
@@ -59,6 +91,13 @@ async def create_payment_session_public(
         import logging
         logging.warning(f"Merchant {merchant.email} creating payment without Stellar address set")
     
+    original = find_original_session(
+        db, merchant.id, session_data.order_id, idempotency_key, session_data.amount_usdc
+    )
+    if original is not None:
+        mark_replayed(response)
+        return _session_response(original)
+    
     # Generate session ID
     session_id = generate_session_id()
     
@@ -68,18 +107,24 @@ async def create_payment_session_public(
         merchant_id=merchant.id,
         amount_fiat=session_data.amount_usdc,  # For now, using USDC as base
         fiat_currency="USD",
-        amount_usdc=session_data.amount_usdc,
+        amount_usdc=str(session_data.amount_usdc),
         status=PaymentStatus.CREATED,
         success_url=str(session_data.success_url) if session_data.success_url else "",
-        cancel_url=str(session_data.cancel_url) if session_data.cancel_url else ""
+        cancel_url=str(session_data.cancel_url) if session_data.cancel_url else "",
+        expires_at=calculate_expiry(),
+        order_id=session_data.order_id,
+        idempotency_key=idempotency_key
     )
     
-    # Set expiry time
-    new_session.expires_at = datetime.utcnow() + timedelta(minutes=settings.PAYMENT_EXPIRY_MINUTES)
-    
     db.add(new_session)
-    db.commit()
+    record_session_created(db, new_session)
+    session = commit_new_session(db, new_session)
+    if session is not new_session:
+        # A concurrent retry created it first
+        mark_replayed(response)
+        return _session_response(session)
     db.refresh(new_session)
+    cache_session(new_session, merchant.name)
     
     # Register session with smart contract (if contract is configured)
     contract_address = None
@@ -96,24 +141,66 @@ async def create_payment_session_public(
         logger.warning(f"Could not register session in smart contract: {e}")
         # Continue without smart contract - fallback to direct payments
     
-    # Generate checkout URL
-    checkout_url = f"{settings.APP_URL}/checkout/{new_session.id}"
+    return _session_response(new_session)
+
+
+@router.post("/batch", response_model=PaymentSessionBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_payment_sessions_batch(
+    batch: PaymentSessionBatchCreate,
+    api_key: str = Depends(get_api_key),
+    db: Session = Depends(get_db)
+):
+    """
+    Create up to SESSION_BATCH_MAX_SIZE payment sessions in one request.
     
-    return PaymentSessionResponse(
-        session_id=new_session.id,
-        checkout_url=checkout_url,
-        amount_usdc=new_session.amount_usdc,
-        order_id=session_data.order_id,
-        expires_at=new_session.expires_at,
-        status=new_session.status.value,
-        success_url=new_session.success_url,
-        cancel_url=new_session.cancel_url
-    )
+    For invoicing and marketplace flows. The batch is validated as a whole
+    and created in one transaction: either every session is created or none
+    is. Order ids must be unique within the batch. Sessions are returned in
+    request order, each with its checkout_url.
+    
+    Orders that already have a session (e.g. when retrying a batch) get
+    their existing session back instead of a new one.
+    
+    Example request body:
+    ```json
+    {
+        "sessions": [
+            {"amount_usdc": 50.00, "order_id": "INV-1001"},
+            {"amount_usdc": 12.50, "order_id": "INV-1002", "success_url": "https://yourstore.com/paid"}
+        ]
+    }
+    ```
+    """
+    merchant = get_merchant_principal(db, api_key)
+    
+    if not merchant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Merchant not found"
+        )
+    
+    if not merchant.stellar_address:
+        logger.warning(f"Merchant {merchant.email} creating payments without Stellar address set")
+    
+    # Validation, the INSERT and the commit block, so they run off the event loop
+    existing, created = await asyncio.to_thread(create_batch, db, merchant, batch.sessions)
+    
+    # One contract registration for the whole batch
+    if created:
+        await register_sessions(merchant, created)
+    
+    by_order_id = {**existing, **{session.order_id: session for session in created}}
+    return PaymentSessionBatchResponse(sessions=[
+        _session_response(by_order_id[spec.order_id]) for spec in batch.sessions
+    ])
 
 
 @router.get("/{session_id}", response_model=PaymentSessionStatus)
 async def get_payment_session_public(
     session_id: str,
+    response: Response,
+    wait: int = Query(0, ge=0, description="Seconds to hold the request until the status changes"),
+    if_none_match: Optional[str] = Header(None),
     api_key: Optional[str] = Depends(get_api_key),
     db: Session = Depends(get_db)
 ):
@@ -134,8 +221,12 @@ async def get_payment_session_public(
         // Show success message
     }
     ```
+    
+    Responses carry an ``ETag``; send it back in ``If-None-Match`` to get
+    ``304 Not Modified`` while the status is unchanged. Add ``?wait=30`` to
+    hold the request until the status changes (long-polling).
     """
-    session = db.query(PaymentSession).filter(PaymentSession.id == session_id).first()
+    session = await read_session_snapshot(session_id)
     
     if not session:
         raise HTTPException(
@@ -145,27 +236,28 @@ async def get_payment_session_public(
     
     # Verify API key belongs to the merchant who created the session
     if api_key:
-        merchant = db.query(Merchant).filter(Merchant.api_key == api_key).first()
+        merchant = get_merchant_principal(db, api_key)
         if not merchant or merchant.id != session.merchant_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
             )
     
-    # Check if session has expired
-    if session.expires_at and datetime.utcnow() > session.expires_at:
-        if session.status == PaymentStatus.CREATED:
-            session.status = PaymentStatus.EXPIRED
-            db.commit()
+    session = await wait_for_session_change(db, session, if_none_match, wait)
+    etag = session_etag(session)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(status_cache_headers(etag))
     
+    # Expiry is persisted by the background sweeper; report it as soon as it is due
     return PaymentSessionStatus(
         session_id=session.id,
-        status=session.status.value,
+        status=effective_status(session).value,
         amount_usdc=session.amount_usdc,
         order_id=session.order_id,
         tx_hash=session.tx_hash,
         created_at=session.created_at,
         paid_at=session.paid_at,
         expires_at=session.expires_at,
-        metadata=session.metadata or {}
+        metadata={}  # Not persisted
     )
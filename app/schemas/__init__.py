@@ -3,12 +3,17 @@ from app.schemas.schemas import (
     MerchantRegister,
     MerchantLogin,
     TokenResponse,
+    ApiKeyResponse,
     MerchantProfileUpdate,
     MerchantProfile,
     PaymentSessionCreate,
     PaymentSessionResponse,
+    PaymentSessionBatchCreate,
+    PaymentSessionBatchResponse,
     PaymentSessionStatus,
     PaymentSessionDetail,
+    TimeSeriesBucket,
+    PaymentTimeSeries,
     WebhookPayload,
     MerchantListItem,
     PaymentListItem,
@@ -19,12 +24,17 @@ __all__ = [
     "MerchantRegister",
     "MerchantLogin",
     "TokenResponse",
+    "ApiKeyResponse",
     "MerchantProfileUpdate",
     "MerchantProfile",
     "PaymentSessionCreate",
     "PaymentSessionResponse",
+    "PaymentSessionBatchCreate",
+    "PaymentSessionBatchResponse",
     "PaymentSessionStatus",
     "PaymentSessionDetail",
+    "TimeSeriesBucket",
+    "PaymentTimeSeries",
     "WebhookPayload",
     "MerchantListItem",
     "PaymentListItem",
@@ -1,8 +1,10 @@
 from pydantic import BaseModel, EmailStr, Field, HttpUrl
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
+from app.core.config import settings
+
 
 # ============= AUTH SCHEMAS =============
 
@@ -20,7 +22,12 @@ class MerchantLogin(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
-    api_key: str  # Merchant's API key for creating payment sessions
+    api_key: Optional[str] = None  # Merchant's API key; only returned when newly issued
+
+
+class ApiKeyResponse(BaseModel):
+    api_key: str  # Shown once; only its prefix and hash are stored
+    api_key_prefix: str
 
 
 # ============= MERCHANT SCHEMAS =============
@@ -38,6 +45,7 @@ class MerchantProfile(BaseModel):
     webhook_url: Optional[str]
     is_active: bool
     created_at: datetime
+    api_key_prefix: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -64,16 +72,27 @@ class PaymentSessionResponse(BaseModel):
     cancel_url: Optional[str]
 
 
+class PaymentSessionBatchCreate(BaseModel):
+    sessions: List[PaymentSessionCreate] = Field(
+        ..., min_length=1, max_length=settings.SESSION_BATCH_MAX_SIZE,
+        description="Sessions to create; all are created or none"
+    )
+
+
+class PaymentSessionBatchResponse(BaseModel):
+    sessions: List[PaymentSessionResponse]
+
+
 class PaymentSessionStatus(BaseModel):
     session_id: str
     status: str
     amount_usdc: str
-    order_id: Optional[str]
+    order_id: Optional[str] = None
     tx_hash: Optional[str]
     created_at: datetime
     paid_at: Optional[datetime]
-    expires_at: Optional[datetime]
-    metadata: Optional[dict]
+    expires_at: Optional[datetime] = None
+    metadata: Optional[dict] = None
     
     class Config:
         from_attributes = True
@@ -97,6 +116,22 @@ class PaymentSessionDetail(BaseModel):
         from_attributes = True
 
 
+class TimeSeriesBucket(BaseModel):
+    bucket_start: datetime
+    sessions_created: int
+    sessions_paid: int
+    sessions_expired: int
+    revenue_usdc: Decimal
+    conversion_rate: float
+
+
+class PaymentTimeSeries(BaseModel):
+    granularity: str
+    start: datetime
+    end: datetime
+    buckets: List[TimeSeriesBucket]
+
+
 # ============= WEBHOOK SCHEMAS =============
 
 class WebhookPayload(BaseModel):
@@ -0,0 +1,69 @@
+"""
+Background Jobs
+Lightweight periodic job runner for maintenance tasks inside the API process.
+
+Jobs are plain functions taking a database session. Each run gets its own
+session, is committed on success and rolled back on error. Jobs run in a
+worker thread so they never block the event loop, and must be safe to run
+concurrently from several API workers.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, List
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval_seconds: float
+    func: Callable[[Session], object]
+
+
+_jobs: List[PeriodicJob] = []
+_tasks: List[asyncio.Task] = []
+
+
+def register_job(name: str, interval_seconds: float, func: Callable[[Session], object]):
+    """Register a job to run every ``interval_seconds`` once jobs are started."""
+    _jobs.append(PeriodicJob(name=name, interval_seconds=interval_seconds, func=func))
+
+
+def run_job_once(job: PeriodicJob):
+    """Run a single job iteration in its own database session."""
+    db = SessionLocal()
+    try:
+        result = job.func(db)
+        db.commit()
+        return result
+    except Exception as e:
+        logger.error(f"Background job '{job.name}' failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def _job_loop(job: PeriodicJob):
+    """Run a job forever at its configured interval."""
+    while True:
+        await asyncio.sleep(job.interval_seconds)
+        await asyncio.to_thread(run_job_once, job)
+
+
+def start_background_jobs():
+    """Start all registered jobs on the running event loop."""
+    for job in _jobs:
+        _tasks.append(asyncio.create_task(_job_loop(job), name=f"job:{job.name}"))
+        logger.info(f"⏱️  Background job '{job.name}' every {job.interval_seconds}s")
+
+
+async def stop_background_jobs():
+    """Cancel all running jobs."""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,251 @@
+"""
+Checkout Page Rendering
+Serves the hosted checkout page from per-merchant precompiled HTML.
+
+``checkout.html`` is rendered once per merchant with the merchant's fields
+filled in and named placeholders for the per-session fields, then split
+into static segments. A page view only escapes the session fields and
+joins them with the segments. The merchant's context (validated Stellar
+address, QR digest, configuration error page) is cached alongside, and
+the paid/expired/error pages are precompiled the same way.
+"""
+import asyncio
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List, Optional
+
+from jinja2 import Environment, FileSystemLoader
+from markupsafe import Markup, escape
+from stellar_sdk import Keypair
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.lookups import get_merchant_by_id
+from app.services.qr_service import qr_digest
+
+# Templates are compiled once; they only change on deploy
+template_env = Environment(loader=FileSystemLoader("app/templates"), autoescape=True, auto_reload=False)
+
+_PLACEHOLDER = re.compile(r"\x00(\w+)\x00")
+
+# checkout.html variables that differ per session
+SESSION_FIELDS = (
+    "session_id",
+    "amount_fiat",
+    "fiat_currency",
+    "amount_usdc",
+    "amount_xlm",
+    "payment_memo",
+    "usdc_uri",
+    "xlm_uri",
+    "success_url",
+    "cancel_url",
+)
+
+
+class PrecompiledPage:
+    """HTML split around ``\\x00name\\x00`` placeholders, filled in with escaped values."""
+
+    def __init__(self, html: str):
+        parts = _PLACEHOLDER.split(html)
+        self._segments: List[str] = parts[0::2]
+        self._fields: List[str] = parts[1::2]
+
+    def render(self, **values) -> str:
+        out = [self._segments[0]]
+        for name, segment in zip(self._fields, self._segments[1:]):
+            out.append(str(escape(values[name])))
+            out.append(segment)
+        return "".join(out)
+
+
+def placeholder(name: str) -> Markup:
+    return Markup(f"\x00{name}\x00")
+
+
+PAID_PAGE = PrecompiledPage(f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Payment Complete</title>
+            <meta http-equiv="refresh" content="2;url={placeholder('success_url')}">
+        </head>
+        <body style="font-family: Arial; text-align: center; padding: 50px;">
+            <h1>✅ Payment Complete!</h1>
+            <p>Redirecting to merchant...</p>
+        </body>
+        </html>
+        """)
+
+EXPIRED_PAGE = PrecompiledPage(f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Payment Expired</title>
+            <meta http-equiv="refresh" content="2;url={placeholder('cancel_url')}">
+        </head>
+        <body style="font-family: Arial; text-align: center; padding: 50px;">
+            <h1>⏰ Payment Expired</h1>
+            <p>This payment session has expired. Redirecting...</p>
+        </body>
+        </html>
+        """)
+
+MISSING_ADDRESS_PAGE = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Configuration Error</title>
+        </head>
+        <body style="font-family: Arial; text-align: center; padding: 50px;">
+            <h1>⚠️ Configuration Error</h1>
+            <p>Merchant has not configured their Stellar wallet address.</p>
+            <p>Please contact the merchant to complete their setup.</p>
+        </body>
+        </html>
+        """
+
+INVALID_ADDRESS_PAGE = PrecompiledPage(f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Configuration Error</title>
+        </head>
+        <body style="font-family: Arial; text-align: center; padding: 50px;">
+            <h1>⚠️ Invalid Stellar Address</h1>
+            <p>Merchant's Stellar address is invalid: {placeholder('address')}</p>
+            <p>Error: {placeholder('error')}</p>
+            <p>Please contact the merchant to fix their configuration.</p>
+        </body>
+        </html>
+        """)
+
+
+@dataclass(frozen=True)
+class MerchantCheckoutContext:
+    """Everything about a merchant's checkout page that does not depend on the session."""
+    merchant_id: object
+    name: str
+    stellar_address: Optional[str]
+    qr_digest: Optional[str]
+    page: Optional[PrecompiledPage]
+    error_page: Optional[str]  # Served with 500 when the address is missing or invalid
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Short hash of the merchant fields shown with a session (name and address)."""
+        return hashlib.sha256(f"{self.name}\x00{self.stellar_address or ''}".encode("utf-8")).hexdigest()[:12]
+
+
+# Merchant id -> MerchantCheckoutContext. Each worker holds its own copy;
+# the TTL bounds how long other workers show an address after it changes.
+checkout_context_cache = TTLCache(
+    maxsize=settings.CHECKOUT_CONTEXT_CACHE_SIZE,
+    ttl=settings.CHECKOUT_CONTEXT_TTL_SECONDS
+)
+
+
+def qr_code_url(merchant_id, digest: str) -> str:
+    """
+    Return the URL of a merchant's address QR code, served by checkout_qr_image.
+
+    It names the image content, so every session of the merchant shares one
+    URL that browsers cache for good.
+    """
+    return f"/checkout/qr/{merchant_id}/{digest}"
+
+
+def build_checkout_context(merchant) -> MerchantCheckoutContext:
+    """Validate the merchant's address and precompile its checkout page."""
+    address = merchant.stellar_address
+    context = dict(merchant_id=merchant.id, name=merchant.name, stellar_address=address)
+
+    if not address:
+        return MerchantCheckoutContext(**context, qr_digest=None, page=None, error_page=MISSING_ADDRESS_PAGE)
+    try:
+        Keypair.from_public_key(address)
+    except Exception as e:
+        error_page = INVALID_ADDRESS_PAGE.render(address=address, error=str(e))
+        return MerchantCheckoutContext(**context, qr_digest=None, page=None, error_page=error_page)
+
+    digest = qr_digest(address, settings.CHECKOUT_QR_FORMAT)
+    html = template_env.get_template("checkout.html").render(
+        merchant_name=merchant.name,
+        stellar_address=address,
+        qr_code_url=qr_code_url(merchant.id, digest),
+        usdc_asset_code=settings.USDC_ASSET_CODE,
+        usdc_asset_issuer=settings.USDC_ASSET_ISSUER,
+        **{name: placeholder(name) for name in SESSION_FIELDS}
+    )
+    return MerchantCheckoutContext(
+        **context,
+        qr_digest=digest,
+        page=PrecompiledPage(html),
+        error_page=None
+    )
+
+
+def _load_checkout_context(merchant_id) -> Optional[MerchantCheckoutContext]:
+    db = SessionLocal()
+    try:
+        merchant = get_merchant_by_id(db, merchant_id)
+        return build_checkout_context(merchant) if merchant else None
+    finally:
+        db.close()
+
+
+async def get_checkout_context(merchant_id) -> Optional[MerchantCheckoutContext]:
+    """Return the merchant's cached checkout context, building it off the event loop on a miss."""
+    return await checkout_context_cache.get_or_load_async(
+        merchant_id,
+        lambda: asyncio.to_thread(_load_checkout_context, merchant_id)
+    )
+
+
+def invalidate_checkout_context(merchant_id):
+    """Drop a merchant's cached checkout page after its profile changes."""
+    checkout_context_cache.delete(merchant_id)
+
+
+def checkout_page_fields(context: MerchantCheckoutContext, session) -> Dict[str, str]:
+    """Return the per-session values of the checkout page."""
+    address = context.stellar_address
+    memo = session.id
+    amount_usdc = session.amount_usdc
+
+    # Calculate XLM equivalent (assuming 1 USDC ≈ 10 XLM for display, adjust based on market rate)
+    # In production, fetch real-time XLM/USD rate from an API
+    amount_xlm = str(float(amount_usdc) * 10)  # Placeholder conversion
+
+    return {
+        "session_id": session.id,
+        "amount_fiat": str(session.amount_fiat),
+        "fiat_currency": session.fiat_currency,
+        "amount_usdc": amount_usdc,
+        "amount_xlm": amount_xlm,
+        "payment_memo": memo,
+        # Payment URIs for "Open in Wallet" buttons (may not work in all wallets)
+        "usdc_uri": (
+            f"stellar:{address}?"
+            f"amount={amount_usdc}&"
+            f"memo={memo}&"
+            f"memo_type=MEMO_TEXT&"
+            f"asset_code={settings.USDC_ASSET_CODE}&"
+            f"asset_issuer={settings.USDC_ASSET_ISSUER}"
+        ),
+        "xlm_uri": (
+            f"stellar:{address}?"
+            f"amount={amount_xlm}&"
+            f"memo={memo}&"
+            f"memo_type=MEMO_TEXT"
+        ),
+        "success_url": session.success_url,
+        "cancel_url": session.cancel_url,
+    }
+
+
+def render_checkout_page(context: MerchantCheckoutContext, session) -> str:
+    return context.page.render(**checkout_page_fields(context, session))
@@ -0,0 +1,122 @@
+"""
+Hot-path Lookups
+Prebuilt statements for the single-row queries run on almost every request.
+
+Each statement is constructed once at import time with bound parameters,
+so a call only binds values and hits SQLAlchemy's compiled-statement cache.
+Building an equivalent ``db.query(...).filter(...).first()`` on every call
+costs roughly twice the CPU (see ``scripts/benchmark_lookups.py``).
+"""
+from typing import Optional
+
+from sqlalchemy import Row, bindparam, select
+from sqlalchemy.orm import Session
+
+from app.models import Merchant, PaymentSession, PaymentStatus
+
+_SESSION_BY_ID = (
+    select(PaymentSession)
+    .where(PaymentSession.id == bindparam("session_id"))
+    .limit(1)
+)
+
+# Only the columns of a session status snapshot, plus the merchant name
+_SESSION_SNAPSHOT_BY_ID = (
+    select(
+        PaymentSession.id,
+        PaymentSession.merchant_id,
+        Merchant.name.label("merchant_name"),
+        PaymentSession.amount_fiat,
+        PaymentSession.fiat_currency,
+        PaymentSession.amount_usdc,
+        PaymentSession.success_url,
+        PaymentSession.cancel_url,
+        PaymentSession.status,
+        PaymentSession.tx_hash,
+        PaymentSession.created_at,
+        PaymentSession.paid_at,
+        PaymentSession.expires_at,
+        PaymentSession.version,
+        PaymentSession.order_id,
+    )
+    .join(Merchant, PaymentSession.merchant_id == Merchant.id)
+    .where(PaymentSession.id == bindparam("session_id"))
+    .limit(1)
+)
+
+_SESSION_BY_ORDER_ID = (
+    select(PaymentSession)
+    .where(
+        PaymentSession.merchant_id == bindparam("merchant_id"),
+        PaymentSession.order_id == bindparam("order_id"),
+        PaymentSession.status != PaymentStatus.EXPIRED
+    )
+    .limit(1)
+)
+
+_SESSION_BY_IDEMPOTENCY_KEY = (
+    select(PaymentSession)
+    .where(
+        PaymentSession.merchant_id == bindparam("merchant_id"),
+        PaymentSession.idempotency_key == bindparam("idempotency_key"),
+        PaymentSession.status != PaymentStatus.EXPIRED
+    )
+    .limit(1)
+)
+
+_MERCHANT_BY_API_KEY = (
+    select(Merchant)
+    .where(Merchant.api_key == bindparam("api_key"))
+    .limit(1)
+)
+
+_MERCHANT_BY_API_KEY_PREFIX = (
+    select(Merchant)
+    .where(Merchant.api_key_prefix == bindparam("api_key_prefix"))
+    .limit(1)
+)
+
+_MERCHANT_BY_ID = (
+    select(Merchant)
+    .where(Merchant.id == bindparam("merchant_id"))
+    .limit(1)
+)
+
+
+def get_session_by_id(db: Session, session_id: str) -> Optional[PaymentSession]:
+    """Return the payment session with ``session_id``, or None."""
+    return db.execute(_SESSION_BY_ID, {"session_id": session_id}).scalars().first()
+
+
+def get_session_snapshot_row(db: Session, session_id: str) -> Optional[Row]:
+    """Return the snapshot columns of ``session_id`` (see ``session_cache``), or None."""
+    return db.execute(_SESSION_SNAPSHOT_BY_ID, {"session_id": session_id}).first()
+
+
+def get_session_by_order_id(db: Session, merchant_id, order_id: str) -> Optional[PaymentSession]:
+    """Return the merchant's unexpired session for ``order_id``, or None."""
+    return db.execute(
+        _SESSION_BY_ORDER_ID, {"merchant_id": merchant_id, "order_id": order_id}
+    ).scalars().first()
+
+
+def get_session_by_idempotency_key(db: Session, merchant_id, idempotency_key: str) -> Optional[PaymentSession]:
+    """Return the merchant's unexpired session created with ``idempotency_key``, or None."""
+    return db.execute(
+        _SESSION_BY_IDEMPOTENCY_KEY, {"merchant_id": merchant_id, "idempotency_key": idempotency_key}
+    ).scalars().first()
+
+
+def get_merchant_by_api_key(db: Session, api_key: str) -> Optional[Merchant]:
+    """Return the merchant whose legacy plaintext key is ``api_key``, or None."""
+    return db.execute(_MERCHANT_BY_API_KEY, {"api_key": api_key}).scalars().first()
+
+
+def get_merchant_by_api_key_prefix(db: Session, prefix: str) -> Optional[Merchant]:
+    """Return the merchant whose hashed API key starts with ``prefix``, or None."""
+    return db.execute(_MERCHANT_BY_API_KEY_PREFIX, {"api_key_prefix": prefix}).scalars().first()
+
+
+def get_merchant_by_id(db: Session, merchant_id) -> Optional[Merchant]:
+    """Return the merchant with ``merchant_id``, or None."""
+    return db.execute(_MERCHANT_BY_ID, {"merchant_id": merchant_id}).scalars().first()
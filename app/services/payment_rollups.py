@@ -0,0 +1,329 @@
+"""
+Payment Rollups
+Incrementally maintained per-merchant daily counters for dashboards and stats.
+
+Every session status change goes through this module so the matching
+``payment_rollups`` rows and hourly time-series buckets are updated (and
+checkout pages notified) in the caller's transaction. Dashboard endpoints
+then aggregate O(days) rollup rows instead of O(sessions).
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, inspect, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import PaymentHourlyBucket, PaymentRollup, PaymentSession, PaymentSessionArchive, PaymentStatus
+from app.services.session_cache import write_through
+from app.services.session_events import notify_status_change
+
+logger = logging.getLogger(__name__)
+
+RollupKey = Tuple[object, date, PaymentStatus]
+
+
+def _session_amount(session: PaymentSession) -> Decimal:
+    """Return the session's USDC amount as a Decimal."""
+    try:
+        return Decimal(str(session.amount_usdc))
+    except Exception:
+        return Decimal("0")
+
+
+def upsert_counters(db: Session, model, key_columns: List[str], rows: List[dict]):
+    """
+    Add counter values to rows of ``model``, inserting rows that don't exist.
+
+    ``key_columns`` name the primary key; every other column in ``rows`` is
+    treated as a counter and added to the stored value.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    counter_columns = [name for name in rows[0] if name not in key_columns]
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in key_columns],
+            set_={
+                name: table.c[name] + stmt.excluded[name]
+                for name in counter_columns
+            },
+        )
+        db.execute(stmt, rows)
+        return
+
+    # Portable fallback for databases without INSERT ... ON CONFLICT
+    for row in rows:
+        existing = db.query(model).filter(
+            *[getattr(model, name) == row[name] for name in key_columns]
+        ).with_for_update().first()
+        if existing:
+            for name in counter_columns:
+                setattr(existing, name, getattr(existing, name) + row[name])
+        else:
+            db.add(model(**row))
+    db.flush()
+
+
+def _upsert_rollups(db: Session, deltas: Dict[RollupKey, Tuple[int, Decimal]]):
+    """Add count/amount deltas to rollup rows, creating rows as needed."""
+    rows = [
+        {
+            "merchant_id": merchant_id,
+            "day": day,
+            "status": status,
+            "session_count": count,
+            "amount_usdc": amount,
+        }
+        for (merchant_id, day, status), (count, amount) in deltas.items()
+        if count or amount
+    ]
+    upsert_counters(db, PaymentRollup, ["merchant_id", "day", "status"], rows)
+
+
+def _record_hourly_event(db: Session, merchant_id, status: PaymentStatus, amount: Decimal, at: datetime):
+    """Count a session event in the merchant's hourly time-series bucket."""
+    row = {
+        "merchant_id": merchant_id,
+        "bucket_start": at.replace(minute=0, second=0, microsecond=0),
+        "sessions_created": 0,
+        "sessions_paid": 0,
+        "sessions_expired": 0,
+        "revenue_usdc": Decimal("0"),
+    }
+    if status == PaymentStatus.CREATED:
+        row["sessions_created"] = 1
+    elif status == PaymentStatus.PAID:
+        row["sessions_paid"] = 1
+        row["revenue_usdc"] = amount
+    else:
+        row["sessions_expired"] = 1
+    upsert_counters(db, PaymentHourlyBucket, ["merchant_id", "bucket_start"], [row])
+
+
+def record_session_created(db: Session, session: PaymentSession, at: Optional[datetime] = None):
+    """Count a newly created session. Call before committing the insert."""
+    at = at or datetime.utcnow()
+    amount = _session_amount(session)
+    _upsert_rollups(db, {
+        (session.merchant_id, at.date(), PaymentStatus.CREATED): (1, amount)
+    })
+    _record_hourly_event(db, session.merchant_id, PaymentStatus.CREATED, amount, at)
+
+
+def record_sessions_created(db: Session, sessions: Iterable[PaymentSession], at: Optional[datetime] = None):
+    """Count a batch of newly created sessions with one upsert per merchant."""
+    at = at or datetime.utcnow()
+    deltas: Dict[RollupKey, Tuple[int, Decimal]] = defaultdict(lambda: (0, Decimal("0")))
+    for session in sessions:
+        key = (session.merchant_id, at.date(), PaymentStatus.CREATED)
+        count, amount = deltas[key]
+        deltas[key] = (count + 1, amount + _session_amount(session))
+    _upsert_rollups(db, deltas)
+
+    bucket_start = at.replace(minute=0, second=0, microsecond=0)
+    upsert_counters(db, PaymentHourlyBucket, ["merchant_id", "bucket_start"], [
+        {
+            "merchant_id": merchant_id,
+            "bucket_start": bucket_start,
+            "sessions_created": count,
+            "sessions_paid": 0,
+            "sessions_expired": 0,
+            "revenue_usdc": Decimal("0"),
+        }
+        for (merchant_id, _, _), (count, _) in deltas.items()
+    ])
+
+
+def transition_session(
+    db: Session,
+    session: PaymentSession,
+    new_status: PaymentStatus,
+    at: Optional[datetime] = None
+) -> bool:
+    """
+    Move a session to ``new_status`` and update the rollups accordingly.
+
+    The row is only updated if it is still in the status ``session`` was
+    loaded with, so a concurrent change (e.g. the expiry sweeper) is never
+    counted twice. The caller is responsible for committing. Returns False
+    and changes nothing if the session is already in ``new_status`` or
+    changed since it was loaded; in the latter case ``session`` is
+    refreshed with its current status.
+    """
+    old_status = session.status
+    if old_status == new_status:
+        return False
+
+    version = (session.version or 1) + 1
+    if inspect(session).persistent:
+        table = PaymentSession.__table__
+        result = db.execute(
+            update(table)
+            .where(table.c.id == session.id, table.c.status == old_status)
+            .values(status=new_status, version=table.c.version + 1)
+        )
+        if result.rowcount != 1:
+            db.refresh(session, ["status", "version"])
+            return False
+        set_committed_value(session, "status", new_status)
+        set_committed_value(session, "version", version)
+    else:
+        # Added in this transaction and not flushed yet
+        session.status = new_status
+        session.version = version
+
+    at = at or datetime.utcnow()
+    amount = _session_amount(session)
+
+    _upsert_rollups(db, {
+        (session.merchant_id, at.date(), old_status): (-1, -amount),
+        (session.merchant_id, at.date(), new_status): (1, amount),
+    })
+    _record_hourly_event(db, session.merchant_id, new_status, amount, at)
+    notify_status_change(db, session.id, new_status)
+    write_through(db, session)
+    return True
+
+
+def record_bulk_transition(
+    db: Session,
+    rows: Iterable,
+    old_status: PaymentStatus,
+    new_status: PaymentStatus,
+    at: Optional[datetime] = None
+):
+    """
+    Record a status change already applied with a bulk UPDATE.
+
+    ``rows`` are the updated sessions' ``(merchant_id, amount_usdc)`` pairs,
+    e.g. from ``UPDATE ... RETURNING``. Rollups and hourly buckets get one
+    upsert per merchant rather than one per session.
+    """
+    at = at or datetime.utcnow()
+    per_merchant: Dict[object, Tuple[int, Decimal]] = defaultdict(lambda: (0, Decimal("0")))
+    for merchant_id, amount_usdc in rows:
+        try:
+            amount = Decimal(str(amount_usdc))
+        except Exception:
+            amount = Decimal("0")
+        count, total = per_merchant[merchant_id]
+        per_merchant[merchant_id] = (count + 1, total + amount)
+
+    deltas: Dict[RollupKey, Tuple[int, Decimal]] = {}
+    for merchant_id, (count, total) in per_merchant.items():
+        deltas[(merchant_id, at.date(), old_status)] = (-count, -total)
+        deltas[(merchant_id, at.date(), new_status)] = (count, total)
+    _upsert_rollups(db, deltas)
+
+    bucket_start = at.replace(minute=0, second=0, microsecond=0)
+    upsert_counters(db, PaymentHourlyBucket, ["merchant_id", "bucket_start"], [
+        {
+            "merchant_id": merchant_id,
+            "bucket_start": bucket_start,
+            "sessions_created": 0,
+            "sessions_paid": count if new_status == PaymentStatus.PAID else 0,
+            "sessions_expired": count if new_status == PaymentStatus.EXPIRED else 0,
+            "revenue_usdc": total if new_status == PaymentStatus.PAID else Decimal("0"),
+        }
+        for merchant_id, (count, total) in per_merchant.items()
+    ])
+
+
+def get_rollup_totals(
+    db: Session,
+    merchant_id=None,
+    windows: Optional[Dict[str, date]] = None
+) -> Dict[PaymentStatus, dict]:
+    """
+    Aggregate rollups by status in a single query.
+
+    Returns ``{status: {"count": ..., "amount_usdc": ..., <window>: ...}}``.
+    Each entry of ``windows`` maps a name to a start day; its value is the
+    net count of rows on or after that day.
+    """
+    windows = windows or {}
+    columns = [
+        PaymentRollup.status,
+        func.sum(PaymentRollup.session_count).label("count"),
+        func.sum(PaymentRollup.amount_usdc).label("amount_usdc"),
+    ]
+    for name, since in windows.items():
+        columns.append(
+            func.sum(PaymentRollup.session_count).filter(PaymentRollup.day >= since).label(name)
+        )
+
+    query = db.query(*columns)
+    if merchant_id is not None:
+        query = query.filter(PaymentRollup.merchant_id == merchant_id)
+
+    totals = {}
+    for status in PaymentStatus:
+        totals[status] = {"count": 0, "amount_usdc": Decimal("0")}
+        totals[status].update({name: 0 for name in windows})
+
+    for row in query.group_by(PaymentRollup.status).all():
+        entry = totals[row.status]
+        entry["count"] = int(row.count or 0)
+        entry["amount_usdc"] = Decimal(row.amount_usdc or 0)
+        for name in windows:
+            entry[name] = int(getattr(row, name) or 0)
+    return totals
+
+
+def rebuild_payment_rollups(db: Session) -> int:
+    """
+    Recompute all rollups from ``payment_sessions`` and its archive.
+
+    Used to backfill existing deployments. Expiry time is not recorded, so
+    expired sessions are attributed to their creation day. Returns the number
+    of sessions processed.
+    """
+    deltas: Dict[RollupKey, Tuple[int, Decimal]] = defaultdict(lambda: (0, Decimal("0")))
+
+    def add(key: RollupKey, count: int, amount: Decimal):
+        current_count, current_amount = deltas[key]
+        deltas[key] = (current_count + count, current_amount + amount)
+
+    processed = 0
+    # Archived sessions still count towards the dashboard figures
+    rows = chain.from_iterable(
+        db.query(
+            model.merchant_id,
+            model.status,
+            model.amount_usdc,
+            model.created_at,
+            model.paid_at,
+        ).yield_per(1000)
+        for model in (PaymentSession, PaymentSessionArchive)
+    )
+
+    for merchant_id, status, amount_usdc, created_at, paid_at in rows:
+        try:
+            amount = Decimal(str(amount_usdc))
+        except Exception:
+            amount = Decimal("0")
+        created_day = created_at.date()
+        add((merchant_id, created_day, PaymentStatus.CREATED), 1, amount)
+
+        if status != PaymentStatus.CREATED:
+            settled_day = paid_at.date() if status == PaymentStatus.PAID and paid_at else created_day
+            add((merchant_id, settled_day, PaymentStatus.CREATED), -1, -amount)
+            add((merchant_id, settled_day, status), 1, amount)
+        processed += 1
+
+    db.query(PaymentRollup).delete()
+    _upsert_rollups(db, deltas)
+    logger.info(f"Rebuilt payment rollups from {processed} session(s)")
+    return processed
@@ -0,0 +1,140 @@
+"""
+Payment Time Series
+Bucketed session, revenue and conversion figures for merchant charts.
+
+Session events are counted into hourly buckets as they happen (see
+``payment_rollups``). A background job compacts hourly buckets older than
+``STATS_HOURLY_RETENTION_DAYS`` into daily buckets, so a chart over a year
+reads at most a few hundred rows.
+"""
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import PaymentDailyBucket, PaymentHourlyBucket
+from app.services.payment_rollups import upsert_counters
+
+logger = logging.getLogger(__name__)
+
+COUNTER_COLUMNS = ("sessions_created", "sessions_paid", "sessions_expired", "revenue_usdc")
+
+
+def hourly_window_start(now: datetime = None) -> datetime:
+    """Return the oldest hour still kept at hourly granularity."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=settings.STATS_HOURLY_RETENTION_DAYS)
+    return cutoff.replace(minute=0, second=0, microsecond=0)
+
+
+def compact_hourly_buckets(db: Session) -> int:
+    """
+    Fold hourly buckets older than the hourly window into daily buckets.
+
+    The hourly rows are removed with DELETE ... RETURNING, so concurrent
+    runs from several workers never fold the same row twice. Returns the
+    number of hourly buckets compacted.
+    """
+    table = PaymentHourlyBucket.__table__
+    deleted = db.execute(
+        delete(table)
+        .where(table.c.bucket_start < hourly_window_start())
+        .returning(table.c.merchant_id, table.c.bucket_start, *[table.c[name] for name in COUNTER_COLUMNS])
+    ).all()
+
+    if not deleted:
+        return 0
+
+    daily: Dict[tuple, dict] = {}
+    for row in deleted:
+        key = (row.merchant_id, row.bucket_start.date())
+        bucket = daily.setdefault(key, {
+            "merchant_id": row.merchant_id,
+            "day": row.bucket_start.date(),
+            "sessions_created": 0,
+            "sessions_paid": 0,
+            "sessions_expired": 0,
+            "revenue_usdc": Decimal("0"),
+        })
+        for name in COUNTER_COLUMNS:
+            bucket[name] += getattr(row, name) or 0
+
+    upsert_counters(db, PaymentDailyBucket, ["merchant_id", "day"], list(daily.values()))
+    logger.info(f"Compacted {len(deleted)} hourly bucket(s) into {len(daily)} daily bucket(s)")
+    return len(deleted)
+
+
+def _empty_bucket() -> dict:
+    return {name: 0 for name in COUNTER_COLUMNS}
+
+
+def get_time_series(
+    db: Session,
+    merchant_id,
+    start: datetime,
+    end: datetime,
+    granularity: str
+) -> List[dict]:
+    """
+    Return contiguous buckets between ``start`` (inclusive) and ``end``
+    (exclusive) for ``granularity`` "hour" or "day". Empty buckets are
+    included with zero counts. Every bucket covers its whole hour or day,
+    including the ones ``start`` and ``end`` fall inside.
+    """
+    buckets: Dict[datetime, dict] = defaultdict(_empty_bucket)
+
+    if granularity == "hour":
+        start = start.replace(minute=0, second=0, microsecond=0)
+        step = timedelta(hours=1)
+    else:
+        start = datetime.combine(start.date(), datetime.min.time())
+        step = timedelta(days=1)
+    # Extend end to a bucket boundary so daily and hourly rows span the same range
+    end = start + step * math.ceil((end - start) / step)
+
+    if granularity == "day":
+        daily_rows = db.query(PaymentDailyBucket).filter(
+            PaymentDailyBucket.merchant_id == merchant_id,
+            PaymentDailyBucket.day >= start.date(),
+            PaymentDailyBucket.day < end.date()
+        ).all()
+        for row in daily_rows:
+            bucket = buckets[datetime.combine(row.day, datetime.min.time())]
+            for name in COUNTER_COLUMNS:
+                bucket[name] += getattr(row, name) or 0
+
+    # Hours that have not been compacted yet
+    hourly_rows = db.query(PaymentHourlyBucket).filter(
+        PaymentHourlyBucket.merchant_id == merchant_id,
+        PaymentHourlyBucket.bucket_start >= start,
+        PaymentHourlyBucket.bucket_start < end
+    ).all()
+    for row in hourly_rows:
+        key = row.bucket_start
+        if granularity == "day":
+            key = datetime.combine(key.date(), datetime.min.time())
+        bucket = buckets[key]
+        for name in COUNTER_COLUMNS:
+            bucket[name] += getattr(row, name) or 0
+
+    series = []
+    current = start
+    while current < end:
+        bucket = buckets.get(current) or _empty_bucket()
+        created = bucket["sessions_created"]
+        series.append({
+            "bucket_start": current,
+            "sessions_created": created,
+            "sessions_paid": bucket["sessions_paid"],
+            "sessions_expired": bucket["sessions_expired"],
+            "revenue_usdc": Decimal(bucket["revenue_usdc"]),
+            "conversion_rate": round(bucket["sessions_paid"] / created * 100, 2) if created else 0,
+        })
+        current += step
+    return series
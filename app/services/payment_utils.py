@@ -1,6 +1,10 @@
 import secrets
 import string
+from datetime import datetime, timedelta
 from decimal import Decimal
+from typing import Optional
+from app.core.config import settings
+from app.models import PaymentSession, PaymentStatus
 
 
 def generate_session_id() -> str:
@@ -31,3 +35,26 @@ def convert_fiat_to_usdc(amount: Decimal, currency: str) -> str:
     
     # Return as string with 2 decimal places
     return f"{usdc_amount:.2f}"
+
+
+def calculate_expiry(created_at: Optional[datetime] = None) -> datetime:
+    """Return when a session created at ``created_at`` (default: now) expires."""
+    return (created_at or datetime.utcnow()) + timedelta(minutes=settings.PAYMENT_EXPIRY_MINUTES)
+
+
+def is_session_expired(session: PaymentSession, now: Optional[datetime] = None) -> bool:
+    """
+    Check whether a session is expired, including pending sessions that are
+    past their expiry but have not been swept yet.
+    """
+    if session.status == PaymentStatus.EXPIRED:
+        return True
+    if session.status != PaymentStatus.CREATED:
+        return False
+    expires_at = session.expires_at or calculate_expiry(session.created_at)
+    return (now or datetime.utcnow()) >= expires_at
+
+
+def effective_status(session: PaymentSession) -> PaymentStatus:
+    """Return the status to report for a session without writing to the database."""
+    return PaymentStatus.EXPIRED if is_session_expired(session) else session.status
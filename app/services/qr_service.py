@@ -0,0 +1,79 @@
+"""
+QR Code Service
+Renders QR codes once per payload and serves repeats from memory.
+
+Checkout QR codes encode the merchant's Stellar address, which is the same
+for every session of that merchant, so rendered images are cached by a
+hash of (payload, format). SVG output is produced by qrcode's pure-Python
+SVG writer and does not touch PIL.
+"""
+import hashlib
+import io
+from dataclasses import dataclass
+from typing import Optional
+
+import qrcode
+import qrcode.image.svg
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+QR_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+# Rendered images never go stale; the TTL only bounds memory for idle merchants
+_qr_cache = TTLCache(maxsize=settings.QR_CACHE_SIZE, ttl=24 * 3600)
+
+
+@dataclass(frozen=True)
+class QRImage:
+    content: bytes
+    media_type: str
+    digest: str  # SHA-256 of format + payload; stable across processes
+
+
+def qr_digest(data: str, image_format: str) -> str:
+    """Return the content address of a QR image."""
+    return hashlib.sha256(f"{image_format}:{data}".encode("utf-8")).hexdigest()
+
+
+def encode_qr(data: str, image_format: str) -> bytes:
+    """Encode ``data`` as a QR image without caching."""
+    qr = qrcode.QRCode(
+        version=1,
+        box_size=10,
+        border=5,
+        image_factory=qrcode.image.svg.SvgPathImage if image_format == "svg" else None
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    
+    buffered = io.BytesIO()
+    if image_format == "svg":
+        qr.make_image().save(buffered)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def render_qr(data: str, image_format: Optional[str] = None) -> QRImage:
+    """
+    Return the QR image for ``data``, rendering it on first use.
+    
+    ``image_format`` is "png" or "svg" and defaults to CHECKOUT_QR_FORMAT.
+    """
+    image_format = (image_format or settings.CHECKOUT_QR_FORMAT).lower()
+    if image_format not in QR_FORMATS:
+        raise ValueError(f"Unsupported QR format: {image_format}")
+    
+    digest = qr_digest(data, image_format)
+    return _qr_cache.get_or_load(
+        digest,
+        lambda: QRImage(
+            content=encode_qr(data, image_format),
+            media_type=QR_FORMATS[image_format],
+            digest=digest
+        )
+    )
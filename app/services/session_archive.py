@@ -0,0 +1,138 @@
+"""
+Session Archival
+Keeps the hot payment_sessions table small.
+
+Closed sessions (expired or paid) older than their retention window are
+moved to payment_sessions_archive in batches. Dashboard figures are not
+affected because they come from the rollups, not from the sessions table.
+
+On PostgreSQL deployments where payment_sessions is range-partitioned by
+month (see migrations/partition_payment_sessions.sql), the same job also
+creates upcoming monthly partitions ahead of time.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime, and_, delete, insert, literal, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import PaymentSession, PaymentSessionArchive, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 1000
+PARTITION_MONTHS_AHEAD = 2
+
+
+def _closed_before_clause(now: datetime):
+    """Build the filter selecting closed sessions past their retention window."""
+    table = PaymentSession.__table__
+    clauses = []
+    if settings.ARCHIVE_EXPIRED_AFTER_DAYS > 0:
+        clauses.append(and_(
+            table.c.status == PaymentStatus.EXPIRED,
+            table.c.created_at < now - timedelta(days=settings.ARCHIVE_EXPIRED_AFTER_DAYS)
+        ))
+    if settings.ARCHIVE_PAID_AFTER_DAYS > 0:
+        clauses.append(and_(
+            table.c.status == PaymentStatus.PAID,
+            table.c.created_at < now - timedelta(days=settings.ARCHIVE_PAID_AFTER_DAYS)
+        ))
+    return or_(*clauses) if clauses else None
+
+
+def archive_closed_sessions(db: Session, now: Optional[datetime] = None, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move closed sessions past their retention window to the archive table.
+
+    Each batch is copied and deleted in one transaction. On PostgreSQL rows
+    locked by a concurrent run are skipped. Returns the number of sessions
+    archived.
+    """
+    now = now or datetime.utcnow()
+    condition = _closed_before_clause(now)
+    if condition is None:
+        return 0
+
+    sessions = PaymentSession.__table__
+    archive = PaymentSessionArchive.__table__
+    columns = [column.name for column in archive.c if column.name in sessions.c]
+    total = 0
+
+    while True:
+        batch_ids = db.execute(
+            select(sessions.c.id)
+            .where(condition)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        if not batch_ids:
+            break
+
+        db.execute(
+            insert(archive).from_select(
+                columns + ["archived_at"],
+                select(*[sessions.c[name] for name in columns], literal(now, DateTime()))
+                .where(sessions.c.id.in_(batch_ids))
+            )
+        )
+        db.execute(delete(sessions).where(sessions.c.id.in_(batch_ids)))
+        db.commit()
+        total += len(batch_ids)
+
+        if len(batch_ids) < batch_size:
+            break
+
+    if total:
+        logger.info(f"🗄️  Archived {total} closed payment session(s)")
+    return total
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    """Return the first day of the month ``offset`` months after ``day``'s month."""
+    month_index = day.year * 12 + (day.month - 1) + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def ensure_monthly_partitions(db: Session, months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """
+    Create monthly partitions of payment_sessions up to ``months_ahead``
+    months from now. No-op unless the table is partitioned on PostgreSQL.
+    Returns the number of partitions created.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return 0
+
+    partitioned = db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass('payment_sessions')"
+    )).scalar()
+    if not partitioned:
+        return 0
+
+    created = 0
+    today = datetime.utcnow().date()
+    for offset in range(months_ahead + 1):
+        start = _month_start(today, offset)
+        end = _month_start(today, offset + 1)
+        name = f"payment_sessions_{start:%Y_%m}"
+        exists = db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists:
+            continue
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF payment_sessions "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        created += 1
+        logger.info(f"Created partition {name}")
+    return created
+
+
+def run_session_maintenance(db: Session) -> int:
+    """Background job: prepare upcoming partitions, then archive old sessions."""
+    ensure_monthly_partitions(db)
+    db.commit()
+    return archive_closed_sessions(db)
@@ -0,0 +1,142 @@
+"""
+Bulk Session Creation
+Creates many payment sessions for one merchant in a single transaction.
+
+Used by ``POST /api/sessions/batch`` for invoicing and marketplace flows.
+The sessions are inserted with one multi-row INSERT (batched by the
+driver) and counted in the rollups with one upsert per merchant, instead
+of a commit, refresh and rollup update per session. Orders that already
+have a session are skipped, so retrying a batch returns the sessions the
+first attempt created.
+"""
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.auth import MerchantPrincipal
+from app.models import PaymentSession, PaymentStatus
+from app.schemas import PaymentSessionCreate
+from app.services.payment_rollups import record_sessions_created
+from app.services.payment_utils import calculate_expiry, generate_session_id
+from app.services.session_idempotency import check_retry, expire_if_lapsed, find_sessions_by_order_id
+from app.services.soroban_validator import validator_service
+
+logger = logging.getLogger(__name__)
+
+
+def validate_batch(specs: Sequence[PaymentSessionCreate]):
+    """Reject a batch that reuses an order id; nothing is created."""
+    duplicates = [order_id for order_id, count in Counter(spec.order_id for spec in specs).items() if count > 1]
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Duplicate order_id in batch: {', '.join(duplicates[:10])}"
+        )
+
+
+def find_existing_sessions(
+    db: Session,
+    merchant: MerchantPrincipal,
+    specs: Sequence[PaymentSessionCreate]
+) -> Dict[str, PaymentSession]:
+    """
+    Return the pending or paid sessions already created for orders in the batch, keyed by order id.
+
+    Raises 409 if one of them is for a different amount. The sessions are
+    detached so they stay readable after the batch commits.
+    """
+    existing = {
+        order_id: session
+        for order_id, session in find_sessions_by_order_id(db, merchant.id, (spec.order_id for spec in specs)).items()
+        if not expire_if_lapsed(db, session)
+    }
+    for spec in specs:
+        session = existing.get(spec.order_id)
+        if session is not None:
+            check_retry(session, spec.order_id, spec.amount_usdc)
+    for session in existing.values():
+        db.expunge(session)
+    return existing
+
+
+def create_sessions(
+    db: Session,
+    merchant: MerchantPrincipal,
+    specs: Sequence[PaymentSessionCreate]
+) -> List[PaymentSession]:
+    """
+    Insert one session per spec and count them in the rollups.
+
+    The caller commits. Returns detached ``PaymentSession`` objects holding
+    the inserted values.
+    """
+    if not specs:
+        return []
+    now = datetime.utcnow()
+    expires_at = calculate_expiry(now)
+    rows = [
+        {
+            "id": generate_session_id(),
+            "merchant_id": merchant.id,
+            "amount_fiat": spec.amount_usdc,  # For now, using USDC as base
+            "fiat_currency": "USD",
+            "amount_usdc": str(spec.amount_usdc),
+            "status": PaymentStatus.CREATED,
+            "success_url": spec.success_url or "",
+            "cancel_url": spec.cancel_url or "",
+            "created_at": now,
+            "expires_at": expires_at,
+            "version": 1,
+            "order_id": spec.order_id,
+        }
+        for spec in specs
+    ]
+    db.execute(insert(PaymentSession), rows)
+
+    sessions = [PaymentSession(**row) for row in rows]
+    record_sessions_created(db, sessions, at=now)
+    return sessions
+
+
+def create_batch(
+    db: Session,
+    merchant: MerchantPrincipal,
+    specs: Sequence[PaymentSessionCreate]
+) -> Tuple[Dict[str, PaymentSession], List[PaymentSession]]:
+    """
+    Validate the batch, create the sessions its orders do not have yet and commit.
+
+    Returns the existing sessions keyed by order id and the created ones.
+    Blocks on the database; async callers run it in a worker thread.
+    """
+    validate_batch(specs)
+    existing = find_existing_sessions(db, merchant, specs)
+    created = create_sessions(db, merchant, [spec for spec in specs if spec.order_id not in existing])
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Some orders in the batch were created concurrently; retry the batch"
+        )
+    return existing, created
+
+
+async def register_sessions(merchant: MerchantPrincipal, sessions: Sequence[PaymentSession]):
+    """Register created sessions with the smart contract in one call, if it is configured."""
+    try:
+        if validator_service.get_contract_address() and merchant.stellar_address:
+            await validator_service.register_payment_sessions(
+                merchant_address=merchant.stellar_address,
+                sessions=[(session.id, session.amount_usdc) for session in sessions]
+            )
+    except Exception as e:
+        logger.warning(f"Could not register {len(sessions)} sessions in smart contract: {e}")
+        # Continue without smart contract - fallback to direct payments
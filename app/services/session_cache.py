@@ -0,0 +1,203 @@
+"""
+Session Status Cache
+Serves payment session status reads from memory.
+
+Status is read on every checkout poll, SDK verification and merchant
+success page, but changes at most twice per session. Each worker keeps a
+bounded cache of ``SessionSnapshot`` objects keyed by session id:
+
+- Sessions are cached when created and on first read. Concurrent misses
+  for the same session share one database query (``read_session_snapshot``).
+- Status changes made in this process (``transition_session``, the expiry
+  sweeper) are written through once their transaction commits.
+- Changes made elsewhere (the Stellar listener, other workers) arrive on
+  the session events channel and drop the stale entry. A load in flight
+  when such a change arrives is returned but not cached, and a load never
+  replaces a newer version. Without PostgreSQL notifications, pending
+  sessions are cached only for SESSION_CACHE_PENDING_TTL_SECONDS.
+"""
+import asyncio
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models import PaymentSession, PaymentStatus
+from app.services.lookups import get_session_snapshot_row
+
+_PENDING_WRITES = "session_cache_pending"
+_STAGED_WRITES = "session_cache_staged"
+
+
+@dataclass(frozen=True)
+class SessionSnapshot:
+    """The session fields status endpoints and checkout need, detached from the DB session."""
+    id: str
+    merchant_id: Any
+    merchant_name: str
+    amount_fiat: Any
+    fiat_currency: str
+    amount_usdc: str
+    success_url: str
+    cancel_url: str
+    status: PaymentStatus
+    tx_hash: Optional[str]
+    created_at: datetime
+    paid_at: Optional[datetime]
+    expires_at: Optional[datetime]
+    version: int
+    order_id: Optional[str]
+
+    @classmethod
+    def from_session(cls, session, merchant_name: str) -> "SessionSnapshot":
+        """Build from a ``PaymentSession`` or a row with the same column names."""
+        return cls(
+            id=session.id,
+            merchant_id=session.merchant_id,
+            merchant_name=merchant_name,
+            amount_fiat=session.amount_fiat,
+            fiat_currency=session.fiat_currency,
+            amount_usdc=session.amount_usdc,
+            success_url=session.success_url,
+            cancel_url=session.cancel_url,
+            status=session.status,
+            tx_hash=session.tx_hash,
+            created_at=session.created_at,
+            paid_at=session.paid_at,
+            expires_at=session.expires_at,
+            version=session.version or 1,
+            order_id=session.order_id
+        )
+
+
+session_cache = TTLCache(maxsize=settings.SESSION_CACHE_SIZE, ttl=settings.SESSION_CACHE_TTL_SECONDS)
+
+# Session id -> last status notified while its load was in flight (None: none yet).
+# Guarded by _loads_lock together with the loads' cache stores.
+_loads_in_flight: Dict[str, Optional[str]] = {}
+_loads_lock = threading.Lock()
+
+
+def _store(snapshot: SessionSnapshot):
+    ttl = None
+    if snapshot.status == PaymentStatus.CREATED and engine.dialect.name != "postgresql":
+        # No cross-process notifications: bound how stale a pending status can be
+        ttl = settings.SESSION_CACHE_PENDING_TTL_SECONDS
+    session_cache.set(snapshot.id, snapshot, ttl)
+
+
+def cache_session(session: PaymentSession, merchant_name: str):
+    """Cache a session just created (and committed) by this process."""
+    _store(SessionSnapshot.from_session(session, merchant_name))
+
+
+def _load(db: Session, session_id: str) -> Optional[SessionSnapshot]:
+    with _loads_lock:
+        _loads_in_flight[session_id] = None
+    snapshot = None
+    try:
+        row = get_session_snapshot_row(db, session_id)
+        if row is not None:
+            snapshot = SessionSnapshot.from_session(row, row.merchant_name)
+    finally:
+        with _loads_lock:
+            notified = _loads_in_flight.pop(session_id, None)
+            if snapshot is not None and notified in (None, snapshot.status.value):
+                cached = session_cache.get(snapshot.id)
+                if cached is None or cached.version < snapshot.version:
+                    _store(snapshot)
+    return snapshot
+
+
+def _load_in_own_session(session_id: str) -> Optional[SessionSnapshot]:
+    db = SessionLocal()
+    try:
+        return _load(db, session_id)
+    finally:
+        db.close()
+
+
+async def read_session_snapshot(session_id: str) -> Optional[SessionSnapshot]:
+    """
+    Return the session's snapshot from cache, loading it on a miss.
+
+    Misses are loaded off the event loop in a short-lived session, and
+    concurrent misses for the same session id share a single query.
+    Unknown sessions are not cached.
+    """
+    return await session_cache.get_or_load_async(
+        session_id,
+        lambda: asyncio.to_thread(_load_in_own_session, session_id),
+        store=False  # _load caches conditionally
+    )
+
+
+def session_read_stats() -> Dict[str, int]:
+    """Cache and coalescing counters of the session read path (this worker)."""
+    return {
+        "cache_size": len(session_cache),
+        "cache_hits": session_cache.hits,
+        "cache_misses": session_cache.misses,
+        "loads": session_cache.loads,
+        "loads_coalesced": session_cache.coalesced,
+        "loads_in_flight": session_cache.loads_in_flight,
+    }
+
+
+def apply_status_notification(session_id: str, status_value: str):
+    """Drop a cached session whose status changed in another process."""
+    with _loads_lock:
+        if session_id in _loads_in_flight:
+            _loads_in_flight[session_id] = status_value
+        snapshot = session_cache.get(session_id)
+        if snapshot is not None and snapshot.status.value != status_value:
+            session_cache.delete(session_id)
+
+
+def record_expired(session_ids: Iterable[str]):
+    """Write through a committed bulk expiry (see ``expire_due_sessions``)."""
+    with _loads_lock:
+        for session_id in session_ids:
+            snapshot = session_cache.get(session_id)
+            if snapshot is not None and snapshot.status == PaymentStatus.CREATED:
+                _store(replace(snapshot, status=PaymentStatus.EXPIRED, version=snapshot.version + 1))
+
+
+def write_through(db: Session, session: PaymentSession):
+    """Update the cached snapshot of ``session`` once ``db`` commits."""
+    db.info.setdefault(_PENDING_WRITES, {})[session.id] = session
+
+
+@event.listens_for(Session, "before_commit")
+def _stage_writes(db: Session):
+    # Read the sessions' final state while they are still loaded
+    pending = db.info.pop(_PENDING_WRITES, None)
+    if not pending:
+        return
+    staged = db.info.setdefault(_STAGED_WRITES, [])
+    for session in pending.values():
+        cached = session_cache.get(session.id)
+        if cached is not None:
+            staged.append(SessionSnapshot.from_session(session, cached.merchant_name))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_writes(db: Session):
+    staged = db.info.pop(_STAGED_WRITES, ())
+    if not staged:
+        return
+    with _loads_lock:
+        for snapshot in staged:
+            _store(snapshot)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(db: Session):
+    db.info.pop(_PENDING_WRITES, None)
+    db.info.pop(_STAGED_WRITES, None)
@@ -0,0 +1,209 @@
+"""
+Session Status Events
+Pushes payment session status changes to checkout pages over Server-Sent Events.
+
+Checkout pages and the button SDK subscribe to a session through
+``SessionEventHub`` instead of polling. Status changes reach the hub from
+whichever process made them:
+
+- PostgreSQL: status transitions issue ``pg_notify`` inside their
+  transaction, so the notification is delivered on commit. Each API worker
+  LISTENs on one dedicated connection.
+- Other databases: each API worker polls the statuses of the sessions it
+  has subscribers for, in one batched query per interval.
+
+Notifications also keep each worker's session status cache current (see
+``session_cache``). Streams report expiry when ``expires_at`` passes,
+without waiting for the sweeper.
+"""
+import asyncio
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models import PaymentSession, PaymentStatus
+from app.services.session_cache import apply_status_notification
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "payment_session_status"
+POLL_BATCH_SIZE = 500
+
+
+class SessionEventHub:
+    """In-process fan-out of session status changes to subscriber queues."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._last_status: Dict[str, str] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        """Register a subscriber on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+        self._subscribers[session_id].add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(session_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[session_id]
+            self._last_status.pop(session_id, None)
+
+    def session_ids(self) -> List[str]:
+        """Return the sessions that currently have subscribers."""
+        return list(self._subscribers)
+
+    def publish(self, session_id: str, status: str):
+        """Deliver a status to the session's subscribers. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None or session_id not in self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(session_id, status)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, session_id, status)
+
+    def _dispatch(self, session_id: str, status: str):
+        if self._last_status.get(session_id) == status:
+            return
+        self._last_status[session_id] = status
+        for queue in list(self._subscribers.get(session_id, ())):
+            try:
+                queue.put_nowait(status)
+            except asyncio.QueueFull:
+                pass
+
+
+hub = SessionEventHub()
+
+
+def notify_status_change(db: Session, session_id: str, status: PaymentStatus):
+    """
+    Announce a session status change to every API worker.
+
+    On PostgreSQL the notification is queued in the caller's transaction
+    and only delivered if it commits. Elsewhere the pollers pick the change
+    up, so this is a no-op.
+    """
+    notify_status_changes(db, [session_id], status)
+
+
+def notify_status_changes(db: Session, session_ids: Iterable[str], status: PaymentStatus):
+    """Announce the same status change for several sessions (e.g. a bulk expiry)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    params = [
+        {"channel": NOTIFY_CHANNEL, "payload": f"{session_id}:{status.value}"}
+        for session_id in session_ids
+    ]
+    if params:
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), params)
+
+
+def poll_subscribed_sessions(db: Session) -> int:
+    """Publish the current status of every subscribed session. Returns sessions checked."""
+    session_ids = hub.session_ids()
+    for start in range(0, len(session_ids), POLL_BATCH_SIZE):
+        rows = db.query(PaymentSession.id, PaymentSession.status).filter(
+            PaymentSession.id.in_(session_ids[start:start + POLL_BATCH_SIZE])
+        ).all()
+        for session_id, status in rows:
+            apply_status_notification(session_id, status.value)
+            hub.publish(session_id, status.value)
+    return len(session_ids)
+
+
+def _listen_for_notifications(stop: threading.Event):
+    """Blocking LISTEN loop on a dedicated PostgreSQL connection."""
+    connection = engine.raw_connection()
+    connection.detach()  # Keep this connection out of the pool
+    try:
+        dbapi_connection = connection.driver_connection
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+        while not stop.is_set():
+            readable, _, _ = select.select([dbapi_connection], [], [], 1.0)
+            if not readable:
+                continue
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                notification = dbapi_connection.notifies.pop(0)
+                session_id, _, status = notification.payload.rpartition(":")
+                apply_status_notification(session_id, status)
+                hub.publish(session_id, status)
+    finally:
+        connection.close()
+
+
+async def _notification_loop(stop: threading.Event):
+    """Run the LISTEN loop in a thread, reconnecting after errors."""
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(_listen_for_notifications, stop)
+        except Exception as e:
+            logger.warning(f"Session event listener disconnected: {e}")
+            await asyncio.sleep(5)
+
+
+def _poll_once():
+    db = SessionLocal()
+    try:
+        poll_subscribed_sessions(db)
+    finally:
+        db.close()
+
+
+async def _poll_loop():
+    """Poll subscribed sessions at SESSION_EVENTS_POLL_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.SESSION_EVENTS_POLL_INTERVAL_SECONDS)
+        if not hub.session_ids():
+            continue
+        try:
+            await asyncio.to_thread(_poll_once)
+        except Exception as e:
+            logger.warning(f"Session status poll failed: {e}")
+
+
+_task: Optional[asyncio.Task] = None
+_stop = threading.Event()
+
+
+def start_session_events():
+    """Start feeding the hub: LISTEN on PostgreSQL, batched polling elsewhere."""
+    global _task
+    if engine.dialect.name == "postgresql":
+        _stop.clear()
+        _task = asyncio.create_task(_notification_loop(_stop), name="session-events")
+        logger.info(f"📡 Session events via LISTEN {NOTIFY_CHANNEL}")
+    else:
+        _task = asyncio.create_task(_poll_loop(), name="session-events")
+        logger.info(f"📡 Session events via polling every {settings.SESSION_EVENTS_POLL_INTERVAL_SECONDS}s")
+
+
+async def stop_session_events():
+    """Stop the notification listener or poller."""
+    global _task
+    _stop.set()
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
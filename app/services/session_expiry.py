@@ -0,0 +1,81 @@
+"""
+Session Expiry Sweeper
+Periodically moves pending sessions past their expiry to EXPIRED in bulk.
+
+Read endpoints never write expiry themselves; they report the effective
+status (see ``payment_utils.effective_status``) and leave the state change
+to this sweeper, so they stay pure reads.
+"""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import PaymentSession, PaymentStatus
+from app.services.payment_rollups import record_bulk_transition
+from app.services.session_cache import record_expired
+from app.services.session_events import notify_status_changes
+
+logger = logging.getLogger(__name__)
+
+SWEEP_BATCH_SIZE = 500
+
+
+def expire_due_sessions(db: Session, now: Optional[datetime] = None, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+    """
+    Expire every pending session whose ``expires_at`` has passed.
+
+    Works in batches picked through the pending-expiry index. On PostgreSQL
+    rows locked by another worker's sweep are skipped. Each batch is
+    committed together with its rollup updates. Returns the number of
+    sessions expired.
+    """
+    now = now or datetime.utcnow()
+    table = PaymentSession.__table__
+    total = 0
+
+    while True:
+        due_ids = (
+            select(table.c.id)
+            .where(
+                table.c.status == PaymentStatus.CREATED,
+                table.c.expires_at <= now
+            )
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        expired = db.execute(
+            update(table)
+            .where(
+                table.c.id.in_(due_ids),
+                table.c.status == PaymentStatus.CREATED
+            )
+            .values(status=PaymentStatus.EXPIRED, version=table.c.version + 1)
+            .returning(table.c.id, table.c.merchant_id, table.c.amount_usdc)
+        ).all()
+
+        if not expired:
+            break
+
+        expired_ids = [session_id for session_id, _, _ in expired]
+        record_bulk_transition(
+            db,
+            [(merchant_id, amount_usdc) for _, merchant_id, amount_usdc in expired],
+            PaymentStatus.CREATED,
+            PaymentStatus.EXPIRED,
+            at=now
+        )
+        notify_status_changes(db, expired_ids, PaymentStatus.EXPIRED)
+        db.commit()
+        record_expired(expired_ids)
+        total += len(expired)
+
+        if len(expired) < batch_size:
+            break
+
+    if total:
+        logger.info(f"⏰ Expired {total} payment session(s)")
+    return total
@@ -0,0 +1,134 @@
+"""
+Idempotent Session Creation
+Makes retried session creates return the session the first attempt created.
+
+A create is a retry of an earlier one when it carries the same
+``Idempotency-Key`` header or, without one, the same ``order_id`` for the
+same merchant. Both are persisted on the session and uniquely indexed per
+merchant, so the check is one indexed lookup, and two attempts racing past
+it are resolved by the unique index: the loser rolls back and returns the
+winner's session.
+
+Only pending and paid sessions are replayed. Expired sessions are left out
+of the unique indexes, so once an order's checkout expires the next create
+opens a new session; one that has lapsed but was not swept yet is expired
+on the spot.
+
+A retry that changes the amount is not a retry and is rejected with 409
+rather than answered with a session for the old amount.
+"""
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import PaymentSession, PaymentStatus
+from app.services.lookups import get_session_by_idempotency_key, get_session_by_order_id
+from app.services.payment_rollups import transition_session
+from app.services.payment_utils import effective_status
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+ORDER_LOOKUP_BATCH_SIZE = 500
+
+
+def _same_amount(a, b) -> bool:
+    try:
+        return Decimal(str(a)) == Decimal(str(b))
+    except InvalidOperation:
+        return str(a) == str(b)
+
+
+def check_retry(session: PaymentSession, order_id: Optional[str], amount_usdc) -> PaymentSession:
+    """Return ``session`` if a create for ``order_id`` and ``amount_usdc`` is a retry of it."""
+    if order_id is not None and session.order_id != order_id:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different order"
+        )
+    if not _same_amount(session.amount_usdc, amount_usdc):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Order {session.order_id} already has payment session {session.id} for a different amount"
+        )
+    return session
+
+
+def find_original_session(
+    db: Session,
+    merchant_id,
+    order_id: Optional[str],
+    idempotency_key: Optional[str],
+    amount_usdc
+) -> Optional[PaymentSession]:
+    """
+    Return the pending or paid session an earlier attempt of this create made, or None.
+
+    Raises 422 when the Idempotency-Key belongs to another order and 409
+    when the order's session is for a different amount.
+    """
+    session = None
+    if idempotency_key:
+        session = get_session_by_idempotency_key(db, merchant_id, idempotency_key)
+    if session is None and order_id:
+        session = get_session_by_order_id(db, merchant_id, order_id)
+    if session is None or expire_if_lapsed(db, session):
+        return None
+    return check_retry(session, order_id, amount_usdc)
+
+
+def expire_if_lapsed(db: Session, session: PaymentSession) -> bool:
+    """
+    Expire a pending session past its expiry that the sweeper has not reached.
+
+    Returns True if the session is expired, so it no longer holds its order
+    id and Idempotency-Key. The caller commits.
+    """
+    if effective_status(session) != PaymentStatus.EXPIRED:
+        return False
+    transition_session(db, session, PaymentStatus.EXPIRED)
+    return session.status == PaymentStatus.EXPIRED
+
+
+def commit_new_session(db: Session, session: PaymentSession) -> PaymentSession:
+    """
+    Commit a newly added session.
+
+    If a concurrent attempt of the same create committed first, roll back
+    and return that attempt's session instead.
+    """
+    try:
+        db.commit()
+        return session
+    except IntegrityError:
+        db.rollback()
+        original = find_original_session(
+            db, session.merchant_id, session.order_id, session.idempotency_key, session.amount_usdc
+        )
+        if original is None:
+            raise
+        return original
+
+
+def mark_replayed(response: Response):
+    """Answer a retried create with 200 and the replay header instead of 201."""
+    response.status_code = status.HTTP_200_OK
+    response.headers[REPLAYED_HEADER] = "true"
+
+
+def find_sessions_by_order_id(db: Session, merchant_id, order_ids: Iterable[str]) -> Dict[str, PaymentSession]:
+    """Return the merchant's unexpired sessions for ``order_ids``, keyed by order id."""
+    order_ids: List[str] = list(order_ids)
+    found = {}
+    for start in range(0, len(order_ids), ORDER_LOOKUP_BATCH_SIZE):
+        rows = db.execute(
+            select(PaymentSession).where(
+                PaymentSession.merchant_id == merchant_id,
+                PaymentSession.order_id.in_(order_ids[start:start + ORDER_LOOKUP_BATCH_SIZE]),
+                PaymentSession.status != PaymentStatus.EXPIRED
+            )
+        ).scalars()
+        found.update((session.order_id, session) for session in rows)
+    return found
@@ -0,0 +1,111 @@
+"""
+Session Status Polling
+Conditional GET and long-polling for the session status endpoints.
+
+Responses carry an ETag built from the session's version and effective
+status. Pollers that send it back in ``If-None-Match`` get an empty 304
+while nothing has changed. With ``wait=N`` the request is also held for up
+to N seconds (capped at SESSION_LONG_POLL_MAX_SECONDS) until the status
+changes, so each round trip reports a change instead of repeating itself.
+Waiting requests hold no database connection.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import PaymentStatus
+from app.services.payment_utils import calculate_expiry, effective_status
+from app.services.session_cache import SessionSnapshot, read_session_snapshot
+from app.services.session_events import hub
+
+
+def session_etag(session: SessionSnapshot, *extra: str) -> str:
+    """Return the strong ETag of a session's current status, plus any ``extra`` validators."""
+    parts = [session.id, str(session.version or 1), effective_status(session).value, *extra]
+    return f'"{".".join(parts)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def status_cache_headers(etag: str) -> Dict[str, str]:
+    """Headers making clients revalidate the status on every poll."""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=status_cache_headers(etag))
+
+
+def _should_wait(session: SessionSnapshot, if_none_match: Optional[str]) -> bool:
+    """Wait only on pending sessions the client already has the latest status of."""
+    if effective_status(session) != PaymentStatus.CREATED:
+        return False
+    return not if_none_match or etag_matches(if_none_match, session_etag(session))
+
+
+async def _reload(db: Session, session_id: str) -> SessionSnapshot:
+    db.rollback()  # Release the request's pooled connection
+    session = await read_session_snapshot(session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment session not found"
+        )
+    return session
+
+
+async def wait_for_session_change(
+    db: Session,
+    session: SessionSnapshot,
+    if_none_match: Optional[str],
+    wait: float
+) -> SessionSnapshot:
+    """
+    Hold a status request for up to ``wait`` seconds while nothing changes.
+
+    The client's baseline is its If-None-Match ETag, or the status at the
+    time of the request when it sent none. Returns at once for paid or
+    expired sessions and for stale ETags; otherwise returns the session's
+    snapshot after a change, the session's expiry, or the timeout.
+    """
+    wait = min(wait, settings.SESSION_LONG_POLL_MAX_SECONDS)
+    if wait <= 0 or not _should_wait(session, if_none_match):
+        return session
+
+    session_id = session.id
+    queue = hub.subscribe(session_id)
+    try:
+        # Re-read after subscribing so a change made just before is not missed
+        session = await _reload(db, session_id)
+        if not _should_wait(session, if_none_match):
+            return session
+
+        expires_at = session.expires_at or calculate_expiry(session.created_at)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while True:
+            timeout = min(deadline - loop.time(), (expires_at - datetime.utcnow()).total_seconds())
+            if timeout <= 0:
+                break
+            try:
+                new_status = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            if new_status != PaymentStatus.CREATED.value:
+                break
+
+        return await _reload(db, session_id)
+    finally:
+        hub.unsubscribe(session_id, queue)
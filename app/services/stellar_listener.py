@@ -7,8 +7,10 @@ from stellar_sdk.exceptions import BaseHorizonError
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
 from app.core.config import settings
-from app.models import PaymentSession, PaymentStatus
+from app.models import PaymentStatus
 from app.services.webhook_service import send_webhook
+from app.services.payment_rollups import transition_session
+from app.services.lookups import get_session_by_id
 import time
 from requests.exceptions import ConnectionError, Timeout, ReadTimeout
 
@@ -58,9 +60,7 @@ class StellarPaymentListener:
                 return
             
             # Find payment session by memo (session_id)
-            session = db.query(PaymentSession).filter(
-                PaymentSession.id == memo
-            ).first()
+            session = get_session_by_id(db, memo)
             
             if not session:
                 logger.info(f"No payment session found for memo: {memo}")
@@ -116,7 +116,12 @@ class StellarPaymentListener:
                 f"Amount: {received_amount} {asset_type}, Tx: {tx_hash}"
             )
             
-            session.status = PaymentStatus.PAID
+            if not transition_session(db, session, PaymentStatus.PAID):
+                # Changed since it was read: a payment still settles a session
+                # the sweeper expired meanwhile, but not one already paid
+                if session.status == PaymentStatus.PAID or not transition_session(db, session, PaymentStatus.PAID):
+                    logger.info(f"Session {memo} already marked as paid, skipping")
+                    return
             session.tx_hash = tx_hash
             session.paid_at = datetime.utcnow()
             
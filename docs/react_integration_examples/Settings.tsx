@@ -38,8 +38,8 @@ export const Settings = () => {
         <div className="usage-example">
           <h3>Quick Integration</h3>
           <pre>{`
-<!-- Add to your website -->
-<script src="https://your-domain.com/chainpe-button.js"></script>
+<!-- Add to your website (or pin a build: /public/dist/chainpe-button.<hash>.js) -->
+<script src="https://your-domain.com/public/chainpe-button.js"></script>
 <button id="chainpe-payment-button"></button>
 
 <script>
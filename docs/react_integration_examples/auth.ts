@@ -4,7 +4,7 @@ import api from './api';
 export interface LoginResponse {
   access_token: string;
   token_type: string;
-  api_key: string;  // Automatically provided
+  api_key?: string;  // Returned on registration; keys are stored hashed, rotate via POST /merchant/api-key
 }
 
 export const authService = {
@@ -36,9 +36,11 @@ export const authService = {
       password,
     });
     
-    // Automatically store both token and API key
+    // Store the token; the API key is only returned when newly issued
     localStorage.setItem('merchant_token', response.data.access_token);
-    localStorage.setItem('merchant_api_key', response.data.api_key);
+    if (response.data.api_key) {
+      localStorage.setItem('merchant_api_key', response.data.api_key);
+    }
     
     return response.data;
   },
@@ -0,0 +1,24 @@
+"""
+Database Migration: Add payment_rollups table
+
+Per-merchant, per-day session counters used by the merchant stats,
+admin health and public stats endpoints.
+
+After running this migration, backfill the table from existing sessions:
+    python -m scripts.rebuild_payment_rollups
+"""
+
+-- Step 1: Create the rollup table
+CREATE TABLE IF NOT EXISTS payment_rollups (
+    merchant_id UUID NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    status payment_status NOT NULL,
+    session_count INTEGER NOT NULL DEFAULT 0,
+    amount_usdc NUMERIC(20, 7) NOT NULL DEFAULT 0,
+    PRIMARY KEY (merchant_id, day, status)
+);
+
+-- Step 2: Verify the table was created
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'payment_rollups';
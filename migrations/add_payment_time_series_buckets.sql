@@ -0,0 +1,49 @@
+"""
+Database Migration: Add time-series bucket tables
+
+Hourly buckets are written as sessions are created, paid and expired.
+A background job in the API compacts hourly buckets older than
+STATS_HOURLY_RETENTION_DAYS into the daily table.
+"""
+
+-- Step 1: Hourly buckets
+CREATE TABLE IF NOT EXISTS payment_buckets_hourly (
+    merchant_id UUID NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMP NOT NULL,
+    sessions_created INTEGER NOT NULL DEFAULT 0,
+    sessions_paid INTEGER NOT NULL DEFAULT 0,
+    sessions_expired INTEGER NOT NULL DEFAULT 0,
+    revenue_usdc NUMERIC(20, 7) NOT NULL DEFAULT 0,
+    PRIMARY KEY (merchant_id, bucket_start)
+);
+
+-- Step 2: Daily buckets
+CREATE TABLE IF NOT EXISTS payment_buckets_daily (
+    merchant_id UUID NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    sessions_created INTEGER NOT NULL DEFAULT 0,
+    sessions_paid INTEGER NOT NULL DEFAULT 0,
+    sessions_expired INTEGER NOT NULL DEFAULT 0,
+    revenue_usdc NUMERIC(20, 7) NOT NULL DEFAULT 0,
+    PRIMARY KEY (merchant_id, day)
+);
+
+-- Step 3: Backfill daily buckets from existing sessions
+-- (expiry time is not recorded, so expired sessions count on their creation day)
+INSERT INTO payment_buckets_daily (merchant_id, day, sessions_created, sessions_paid, sessions_expired, revenue_usdc)
+SELECT merchant_id, day,
+       SUM(created), SUM(paid), SUM(expired), SUM(revenue)
+FROM (
+    SELECT merchant_id, created_at::date AS day,
+           1 AS created, 0 AS paid,
+           CASE WHEN status = 'expired' THEN 1 ELSE 0 END AS expired,
+           0::numeric AS revenue
+    FROM payment_sessions
+    UNION ALL
+    SELECT merchant_id, paid_at::date AS day,
+           0, 1, 0, amount_usdc::numeric
+    FROM payment_sessions
+    WHERE status = 'paid' AND paid_at IS NOT NULL
+) events
+GROUP BY merchant_id, day
+ON CONFLICT (merchant_id, day) DO NOTHING;
@@ -0,0 +1,21 @@
+"""
+Database Migration: Persist session expiry and index pending sessions
+
+Adds expires_at to payment_sessions, backfills it from created_at and
+PAYMENT_EXPIRY_MINUTES (15 by default; adjust the interval below if you
+changed it), and creates the partial index used by the expiry sweeper.
+"""
+
+-- Step 1: Add the expires_at column
+ALTER TABLE payment_sessions
+ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP;
+
+-- Step 2: Backfill existing sessions
+UPDATE payment_sessions
+SET expires_at = created_at + INTERVAL '15 minutes'
+WHERE expires_at IS NULL;
+
+-- Step 3: Index pending sessions by expiry (only pending rows are indexed)
+CREATE INDEX IF NOT EXISTS idx_payment_sessions_pending_expiry
+ON payment_sessions(expires_at)
+WHERE status = 'created';
@@ -0,0 +1,45 @@
+"""
+Database Migration: Persist order ids and idempotency keys of payment sessions
+
+Session creation returns the original session when a merchant retries with
+the same order_id or Idempotency-Key header. Both are unique per merchant
+among sessions that have not expired, so an order whose checkout expired
+can get a new session. Sessions created before this migration have neither
+and are unaffected.
+
+On a payment_sessions table partitioned by month (see
+partition_payment_sessions.sql), PostgreSQL only allows unique indexes that
+include created_at, so the indexes are created non-unique there: retries
+are still answered from the index lookup, but two racing first attempts
+are not rejected by the database.
+Partitioning drops these indexes; run this migration again afterwards.
+"""
+
+BEGIN;
+
+ALTER TABLE payment_sessions ADD COLUMN IF NOT EXISTS order_id VARCHAR;
+ALTER TABLE payment_sessions ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR;
+ALTER TABLE payment_sessions_archive ADD COLUMN IF NOT EXISTS order_id VARCHAR;
+
+DO $$
+DECLARE
+    uniqueness TEXT := 'UNIQUE';
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'payment_sessions'::regclass
+    ) THEN
+        uniqueness := '';
+        RAISE NOTICE 'payment_sessions is partitioned: creating non-unique order/idempotency indexes';
+    END IF;
+
+    EXECUTE format(
+        'CREATE %s INDEX IF NOT EXISTS uq_payment_sessions_merchant_order ON payment_sessions(merchant_id, order_id) WHERE status <> ''expired''',
+        uniqueness
+    );
+    EXECUTE format(
+        'CREATE %s INDEX IF NOT EXISTS uq_payment_sessions_merchant_idempotency_key ON payment_sessions(merchant_id, idempotency_key) WHERE status <> ''expired''',
+        uniqueness
+    );
+END $$;
+
+COMMIT;
@@ -0,0 +1,10 @@
+"""
+Database Migration: Add a version counter to payment sessions
+
+The version is incremented on every status change and used as the ETag of
+the session status endpoints, so pollers can revalidate with
+If-None-Match and get 304 Not Modified while nothing changes.
+"""
+
+ALTER TABLE payment_sessions
+ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,26 @@
+"""
+Database Migration: Store merchant API keys as prefix + HMAC hash
+
+Adds api_key_prefix (public, unique, indexed) and api_key_hash columns.
+Existing plaintext keys keep working and are hashed on first use; run
+scripts/hash_api_keys.py afterwards to hash them all at once. The hash
+secret (API_KEY_HASH_SECRET, or JWT_SECRET when unset) must match the API's.
+"""
+
+-- Step 1: Add the prefix and hash columns
+ALTER TABLE merchants
+ADD COLUMN IF NOT EXISTS api_key_prefix VARCHAR UNIQUE,
+ADD COLUMN IF NOT EXISTS api_key_hash VARCHAR;
+
+-- Step 2: Create index for prefix lookups
+CREATE INDEX IF NOT EXISTS idx_merchants_api_key_prefix ON merchants(api_key_prefix);
+
+-- Step 3: Verify the columns were added
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'merchants' AND column_name IN ('api_key_prefix', 'api_key_hash');
+
+-- Expected result:
+-- column_name    | data_type         | is_nullable
+-- api_key_prefix | character varying | YES
+-- api_key_hash   | character varying | YES
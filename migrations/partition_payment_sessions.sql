@@ -0,0 +1,91 @@
+"""
+Database Migration: Partition payment_sessions by month and add the archive table
+
+PostgreSQL 12+ only. Converts payment_sessions into a table range-partitioned
+on created_at with one partition per month, plus a default partition for
+anything outside the prepared range. The API's session maintenance job
+creates upcoming monthly partitions automatically afterwards.
+
+Partitioned tables require the partition key in the primary key, so the
+primary key becomes (id, created_at). Session ids are random, so id stays
+unique in practice.
+
+Run during a maintenance window: the data copy holds locks on payment_sessions.
+"""
+
+BEGIN;
+
+-- Step 1: Archive table for closed sessions moved out of the hot table
+CREATE TABLE IF NOT EXISTS payment_sessions_archive (
+    id VARCHAR PRIMARY KEY,
+    merchant_id UUID NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    amount_fiat NUMERIC(10, 2) NOT NULL,
+    fiat_currency VARCHAR NOT NULL,
+    amount_usdc VARCHAR NOT NULL,
+    status payment_status NOT NULL,
+    success_url VARCHAR NOT NULL,
+    cancel_url VARCHAR NOT NULL,
+    tx_hash VARCHAR,
+    created_at TIMESTAMP NOT NULL,
+    paid_at TIMESTAMP,
+    expires_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_payment_sessions_archive_merchant_id ON payment_sessions_archive(merchant_id);
+
+-- Step 2: Move the existing table aside
+ALTER TABLE payment_sessions RENAME TO payment_sessions_unpartitioned;
+ALTER INDEX IF EXISTS idx_payment_sessions_merchant_id RENAME TO idx_payment_sessions_unpartitioned_merchant_id;
+ALTER INDEX IF EXISTS idx_payment_sessions_status RENAME TO idx_payment_sessions_unpartitioned_status;
+ALTER INDEX IF EXISTS idx_payment_sessions_created_at RENAME TO idx_payment_sessions_unpartitioned_created_at;
+ALTER INDEX IF EXISTS idx_payment_sessions_pending_expiry RENAME TO idx_payment_sessions_unpartitioned_pending_expiry;
+
+-- Step 3: Create the partitioned parent table
+CREATE TABLE payment_sessions (
+    LIKE payment_sessions_unpartitioned INCLUDING DEFAULTS,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER TABLE payment_sessions
+    ADD CONSTRAINT payment_sessions_merchant_id_fkey
+    FOREIGN KEY (merchant_id) REFERENCES merchants(id) ON DELETE CASCADE;
+
+CREATE INDEX idx_payment_sessions_merchant_id ON payment_sessions(merchant_id);
+CREATE INDEX idx_payment_sessions_status ON payment_sessions(status);
+CREATE INDEX idx_payment_sessions_created_at ON payment_sessions(created_at);
+CREATE INDEX idx_payment_sessions_pending_expiry ON payment_sessions(expires_at) WHERE status = 'created';
+
+-- Step 4: One partition per month from the oldest session to two months ahead
+DO $$
+DECLARE
+    month_start DATE;
+    last_month DATE := date_trunc('month', now() + INTERVAL '2 months')::date;
+BEGIN
+    SELECT COALESCE(date_trunc('month', MIN(created_at))::date, date_trunc('month', now())::date)
+    INTO month_start
+    FROM payment_sessions_unpartitioned;
+
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF payment_sessions FOR VALUES FROM (%L) TO (%L)',
+            'payment_sessions_' || to_char(month_start, 'YYYY_MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+CREATE TABLE IF NOT EXISTS payment_sessions_default PARTITION OF payment_sessions DEFAULT;
+
+-- Step 5: Copy the data and drop the old table
+INSERT INTO payment_sessions SELECT * FROM payment_sessions_unpartitioned;
+DROP TABLE payment_sessions_unpartitioned;
+
+COMMIT;
+
+-- Step 6: Verify the partitions
+SELECT inhrelid::regclass AS partition
+FROM pg_inherits
+WHERE inhparent = 'payment_sessions'::regclass
+ORDER BY 1;
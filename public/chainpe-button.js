@@ -159,11 +159,11 @@
         },
         
         /**
-         * Verify payment status (call this on success_url page)
-         * @param {string} sessionId - Payment session ID from URL parameter
+         * Fetch a payment session's current data once
+         * @param {string} sessionId - Payment session ID
          * @returns {Promise<Object>} Payment session data
          */
-        verifyPayment: async function(sessionId) {
+        getSession: async function(sessionId) {
             try {
                 const response = await fetch(`${this.config.apiUrl}/api/sessions/${sessionId}`, {
                     method: 'GET',
@@ -173,15 +173,101 @@
                 });
                 
                 if (!response.ok) {
-                    throw new Error('Failed to verify payment');
+                    const error = new Error('Failed to fetch payment session');
+                    error.status = response.status;
+                    throw error;
                 }
                 
                 return await response.json();
                 
             } catch (error) {
-                console.error('ChainPe verification error:', error);
+                console.error('ChainPe session error:', error);
                 throw error;
             }
+        },
+        
+        /**
+         * Verify payment status (call this on success_url page)
+         * @param {string} sessionId - Payment session ID from URL parameter
+         * @returns {Promise<Object>} Payment session data, with its current status
+         */
+        verifyPayment: function(sessionId) {
+            return this.getSession(sessionId);
+        },
+        
+        /**
+         * Wait with watchPayment until the session is paid or expired,
+         * then fetch its data once.
+         * @param {string} sessionId - Payment session ID
+         * @returns {Promise<Object>} Payment session data
+         */
+        waitForPayment: function(sessionId) {
+            return new Promise((resolve, reject) => {
+                this.watchPayment(sessionId, (status) => {
+                    if (status === 'paid' || status === 'expired') {
+                        this.getSession(sessionId).then(resolve, reject);
+                    }
+                }, reject);
+            });
+        },
+        
+        /**
+         * Watch a payment session's status until it is paid or expired.
+         * Uses Server-Sent Events, falling back to polling getSession
+         * every 3 seconds where EventSource is unavailable.
+         * @param {string} sessionId - Payment session ID
+         * @param {Function} onStatus - Called with 'created', 'paid' or 'expired'
+         * @param {Function} [onError] - Called with the error if the session does not exist
+         * @returns {Function} Call to stop watching
+         */
+        watchPayment: function(sessionId, onStatus, onError) {
+            let source = null;
+            let pollTimer = null;
+            let lastStatus = null;
+            
+            const stop = () => {
+                if (source) source.close();
+                clearInterval(pollTimer);
+            };
+            
+            const report = (status) => {
+                if (status === lastStatus) return;
+                lastStatus = status;
+                if (status === 'paid' || status === 'expired') stop();
+                onStatus(status);
+            };
+            
+            const poll = () => {
+                pollTimer = setInterval(async () => {
+                    try {
+                        const session = await this.getSession(sessionId);
+                        report(session.status);
+                    } catch (error) {
+                        // Keep polling through transient errors; getSession already logged them
+                        if (error.status === 404) {
+                            stop();
+                            if (onError) onError(error);
+                        }
+                    }
+                }, 3000);
+            };
+            
+            if (!window.EventSource) {
+                poll();
+                return stop;
+            }
+            
+            source = new EventSource(`${this.config.apiUrl}/public/session/${sessionId}/events`);
+            source.addEventListener('status', (event) => {
+                report(JSON.parse(event.data).status);
+            });
+            source.onerror = () => {
+                // EventSource reconnects by itself unless the stream was refused
+                if (source.readyState === EventSource.CLOSED && lastStatus !== 'paid' && lastStatus !== 'expired') {
+                    poll();
+                }
+            };
+            return stop;
         }
     };
     
@@ -15,7 +15,9 @@ CREATE TABLE merchants (
     name VARCHAR NOT NULL,
     email VARCHAR UNIQUE NOT NULL,
     password_hash VARCHAR NOT NULL,
-    api_key VARCHAR UNIQUE,
+    api_key VARCHAR UNIQUE,  -- Legacy plaintext key, cleared once hashed
+    api_key_prefix VARCHAR UNIQUE,
+    api_key_hash VARCHAR,
     stellar_address VARCHAR,
     webhook_url VARCHAR,
     is_active BOOLEAN NOT NULL DEFAULT TRUE,
@@ -25,6 +27,7 @@ CREATE TABLE merchants (
 -- Create indexes for merchants
 CREATE INDEX idx_merchants_email ON merchants(email);
 CREATE INDEX idx_merchants_api_key ON merchants(api_key);
+CREATE INDEX idx_merchants_api_key_prefix ON merchants(api_key_prefix);
 
 -- ============================================================
 -- Payment Sessions Table
@@ -40,13 +43,86 @@ CREATE TABLE payment_sessions (
     cancel_url VARCHAR NOT NULL,
     tx_hash VARCHAR,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    paid_at TIMESTAMP
+    paid_at TIMESTAMP,
+    expires_at TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,
+    order_id VARCHAR,
+    idempotency_key VARCHAR
 );
 
 -- Create indexes for payment_sessions
 CREATE INDEX idx_payment_sessions_merchant_id ON payment_sessions(merchant_id);
 CREATE INDEX idx_payment_sessions_status ON payment_sessions(status);
 CREATE INDEX idx_payment_sessions_created_at ON payment_sessions(created_at);
+-- Pending sessions by expiry, used by the expiry sweeper
+CREATE INDEX idx_payment_sessions_pending_expiry ON payment_sessions(expires_at) WHERE status = 'created';
+-- Retried creates look up the original session by order id or Idempotency-Key;
+-- expired sessions are left out so an order can be paid with a new session
+CREATE UNIQUE INDEX uq_payment_sessions_merchant_order ON payment_sessions(merchant_id, order_id) WHERE status <> 'expired';
+CREATE UNIQUE INDEX uq_payment_sessions_merchant_idempotency_key ON payment_sessions(merchant_id, idempotency_key) WHERE status <> 'expired';
+
+-- ============================================================
+-- Payment Sessions Archive
+-- ============================================================
+-- Closed sessions older than the retention window are moved here by the
+-- API's session maintenance job. See migrations/partition_payment_sessions.sql
+-- to range-partition payment_sessions by month.
+CREATE TABLE payment_sessions_archive (
+    id VARCHAR PRIMARY KEY,
+    merchant_id UUID NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    amount_fiat NUMERIC(10, 2) NOT NULL,
+    fiat_currency VARCHAR NOT NULL,
+    amount_usdc VARCHAR NOT NULL,
+    status payment_status NOT NULL,
+    success_url VARCHAR NOT NULL,
+    cancel_url VARCHAR NOT NULL,
+    tx_hash VARCHAR,
+    created_at TIMESTAMP NOT NULL,
+    paid_at TIMESTAMP,
+    expires_at TIMESTAMP,
+    order_id VARCHAR,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_payment_sessions_archive_merchant_id ON payment_sessions_archive(merchant_id);
+
+-- ============================================================
+-- Payment Rollups Table
+-- ============================================================
+-- Net flow of sessions into each status per merchant and day.
+-- Summing a status over all days gives the current count in that status.
+CREATE TABLE payment_rollups (
+    merchant_id UUID NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    status payment_status NOT NULL,
+    session_count INTEGER NOT NULL DEFAULT 0,
+    amount_usdc NUMERIC(20, 7) NOT NULL DEFAULT 0,
+    PRIMARY KEY (merchant_id, day, status)
+);
+
+-- ============================================================
+-- Time-Series Buckets
+-- ============================================================
+-- Session events per hour; compacted into days after STATS_HOURLY_RETENTION_DAYS.
+CREATE TABLE payment_buckets_hourly (
+    merchant_id UUID NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMP NOT NULL,
+    sessions_created INTEGER NOT NULL DEFAULT 0,
+    sessions_paid INTEGER NOT NULL DEFAULT 0,
+    sessions_expired INTEGER NOT NULL DEFAULT 0,
+    revenue_usdc NUMERIC(20, 7) NOT NULL DEFAULT 0,
+    PRIMARY KEY (merchant_id, bucket_start)
+);
+
+CREATE TABLE payment_buckets_daily (
+    merchant_id UUID NOT NULL REFERENCES merchants(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    sessions_created INTEGER NOT NULL DEFAULT 0,
+    sessions_paid INTEGER NOT NULL DEFAULT 0,
+    sessions_expired INTEGER NOT NULL DEFAULT 0,
+    revenue_usdc NUMERIC(20, 7) NOT NULL DEFAULT 0,
+    PRIMARY KEY (merchant_id, day)
+);
 
 -- ============================================================
 -- Admins Table
@@ -113,6 +189,10 @@ VALUES (
 -- ============================================================
 
 -- Drop all tables
+-- DROP TABLE IF EXISTS payment_buckets_daily CASCADE;
+-- DROP TABLE IF EXISTS payment_buckets_hourly CASCADE;
+-- DROP TABLE IF EXISTS payment_rollups CASCADE;
+-- DROP TABLE IF EXISTS payment_sessions_archive CASCADE;
 -- DROP TABLE IF EXISTS payment_sessions CASCADE;
 -- DROP TABLE IF EXISTS merchants CASCADE;
 -- DROP TABLE IF EXISTS admins CASCADE;
@@ -0,0 +1,77 @@
+"""
+Benchmark Checkout Rendering
+
+Measures checkout page render latency (p50/p99) of a full per-view Jinja
+render, including address validation and QR digest, against rendering
+the per-session fields into the merchant's precompiled page. Also checks
+that both produce identical HTML.
+
+Usage:
+    python -m scripts.benchmark_checkout [iterations]
+"""
+
+import statistics
+import sys
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from stellar_sdk import Keypair
+
+from app.core.config import settings
+from app.services.checkout_render import (
+    build_checkout_context,
+    checkout_page_fields,
+    qr_code_url,
+    render_checkout_page,
+    template_env,
+)
+from app.services.qr_service import qr_digest
+from scripts.benchmark_utils import latencies, percentile
+
+
+def _full_render(merchant, session) -> str:
+    """Render the page the way every view used to: validate, digest, full template."""
+    Keypair.from_public_key(merchant.stellar_address)
+    digest = qr_digest(merchant.stellar_address, settings.CHECKOUT_QR_FORMAT)
+    context = SimpleNamespace(stellar_address=merchant.stellar_address, qr_digest=digest)
+    return template_env.get_template("checkout.html").render(
+        merchant_name=merchant.name,
+        stellar_address=merchant.stellar_address,
+        qr_code_url=qr_code_url(merchant.id, digest),
+        usdc_asset_code=settings.USDC_ASSET_CODE,
+        usdc_asset_issuer=settings.USDC_ASSET_ISSUER,
+        **checkout_page_fields(context, session)
+    )
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    merchant = SimpleNamespace(id=1, name="Demo <Store>", stellar_address=Keypair.random().public_key)
+    session = SimpleNamespace(
+        id="pay_benchmark000001",
+        amount_fiat=Decimal("49.99"),
+        fiat_currency="USD",
+        amount_usdc="49.99",
+        success_url="https://shop.example/success?order=1&ref=x",
+        cancel_url="https://shop.example/cart",
+        created_at=datetime.utcnow(),
+    )
+    context = build_checkout_context(merchant)
+
+    assert render_checkout_page(context, session) == _full_render(merchant, session), "renders differ"
+
+    print(f"{'render':<14}{'p50':>10}{'p99':>10}{'mean':>10}")
+    for name, func in (
+        ("full", lambda: _full_render(merchant, session)),
+        ("precompiled", lambda: render_checkout_page(context, session)),
+    ):
+        samples = latencies(func, iterations)
+        print(
+            f"{name:<14}{percentile(samples, 50):>8.0f}µs"
+            f"{percentile(samples, 99):>8.0f}µs{statistics.mean(samples):>8.0f}µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark Hot-path Lookups
+
+Compares per-call CPU time of ad-hoc ORM queries against the prebuilt
+statements in app.services.lookups, using rows from the configured database.
+
+Usage:
+    python -m scripts.benchmark_lookups [iterations]
+"""
+
+import sys
+
+from app.core.database import SessionLocal
+from app.models import Merchant, PaymentSession
+from app.services.lookups import get_merchant_by_api_key_prefix, get_merchant_by_id, get_session_by_id
+from scripts.benchmark_utils import time_per_call
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    db = SessionLocal()
+    try:
+        merchant = db.query(Merchant).filter(Merchant.api_key_prefix.isnot(None)).first()
+        session = db.query(PaymentSession).first()
+        if not merchant or not session:
+            print("❌ Need at least one merchant with an API key and one payment session")
+            return
+
+        cases = [
+            (
+                "session by id",
+                lambda: db.query(PaymentSession).filter(PaymentSession.id == session.id).first(),
+                lambda: get_session_by_id(db, session.id),
+            ),
+            (
+                "merchant by key prefix",
+                lambda: db.query(Merchant).filter(Merchant.api_key_prefix == merchant.api_key_prefix).first(),
+                lambda: get_merchant_by_api_key_prefix(db, merchant.api_key_prefix),
+            ),
+            (
+                "merchant by id",
+                lambda: db.query(Merchant).filter(Merchant.id == merchant.id).first(),
+                lambda: get_merchant_by_id(db, merchant.id),
+            ),
+        ]
+
+        print(f"{'lookup':<22}{'orm query':>12}{'prebuilt':>12}{'saved':>12}")
+        for name, adhoc, prebuilt in cases:
+            adhoc_us = time_per_call(adhoc, iterations)
+            prebuilt_us = time_per_call(prebuilt, iterations)
+            saved = (1 - prebuilt_us / adhoc_us) * 100 if adhoc_us else 0
+            print(f"{name:<22}{adhoc_us:>10.1f}µs{prebuilt_us:>10.1f}µs{saved:>11.0f}%")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Benchmark QR Rendering
+
+Measures per-call CPU time of rendering a checkout QR code as PNG and SVG,
+and of serving it from the QR cache afterwards.
+
+Usage:
+    python -m scripts.benchmark_qr [iterations]
+"""
+
+import sys
+
+from stellar_sdk import Keypair
+
+from app.services.qr_service import encode_qr, render_qr
+from scripts.benchmark_utils import time_per_call
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    address = Keypair.random().public_key
+
+    print(f"{'format':<8}{'render':>12}{'cached':>12}{'size':>10}")
+    for image_format in ("png", "svg"):
+        render_us = time_per_call(lambda: encode_qr(address, image_format), iterations)
+        cached_us = time_per_call(lambda: render_qr(address, image_format), iterations * 100)
+        size = len(render_qr(address, image_format).content)
+        print(f"{image_format:<8}{render_us:>10.0f}µs{cached_us:>10.1f}µs{size:>9}B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Benchmark Helpers
+
+Timing helpers shared by the scripts.benchmark_* scripts. The timers
+call ``func`` once before timing it, so caches are warm.
+"""
+
+import time
+
+
+def time_per_call(func, iterations: int) -> float:
+    """Return the mean CPU time of ``func`` in microseconds."""
+    func()
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+def latencies(func, iterations: int):
+    """Return per-call wall times of ``func`` in microseconds."""
+    func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return samples
+
+
+def percentile(samples, pct: float) -> float:
+    """Return the ``pct`` percentile of ``samples`` (nearest rank)."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
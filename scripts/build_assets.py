@@ -0,0 +1,136 @@
+"""
+Build Static Assets
+
+Builds public/ into public/dist/ for PrecompressedStaticFiles:
+
+- JavaScript is minified (with rjsmin, when installed) and CSS/JS files
+  get the first 10 hex digits of their content hash in the file name, so
+  they can be cached forever.
+- Every built file gets precompressed .gz and, with the brotli package
+  installed, .br siblings.
+- HTML pages have their src/href references to fingerprinted files
+  rewritten to the built name (dist/chainpe-button.<hash>.js).
+- dist/manifest.json maps each source name to its built name; requests
+  for the source name (e.g. /public/chainpe-button.js) are answered with
+  the current build.
+- Built files keep their source file's mtime (for HTML pages, the newest
+  of theirs and the files they reference), so rebuilding unchanged sources
+  does not change their Last-Modified.
+
+Run on every deploy, after installing requirements.
+
+Usage:
+    python -m scripts.build_assets
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "public")
+DIST_DIR = os.path.join(PUBLIC_DIR, "dist")
+MANIFEST_NAME = "manifest.json"
+
+SOURCE_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json")
+FINGERPRINT_EXTENSIONS = (".js", ".css")
+# Built after the fingerprinted files, whose built names they reference
+REFERENCING_EXTENSIONS = (".html",)
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def minify(name: str, content: bytes) -> bytes:
+    """Minify JavaScript; other files are left as they are."""
+    if name.endswith(".js") and rjsmin is not None:
+        return rjsmin.jsmin(content.decode("utf-8")).encode("utf-8") + b"\n"
+    return content
+
+
+def built_name(name: str, content: bytes) -> str:
+    """Return ``name`` with a content hash before the extension, for cacheable types."""
+    stem, ext = os.path.splitext(name)
+    if ext not in FINGERPRINT_EXTENSIONS:
+        return name
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+
+def rewrite_references(content: bytes, manifest: dict) -> bytes:
+    """Point src/href attributes naming a fingerprinted source at its built name."""
+    text = content.decode("utf-8")
+    for name, built in manifest.items():
+        if built == name:
+            continue
+        pattern = re.compile(r"""((?:src|href)=["'](?:[^"']*/)?)""" + re.escape(name) + r"""(?=["'])""")
+        text = pattern.sub(lambda match: f"{match.group(1)}dist/{built}", text)
+    return text.encode("utf-8")
+
+
+def write_variants(path: str, content: bytes, mtime: float):
+    """Write ``content`` to ``path`` with its precompressed .gz and .br siblings, all dated ``mtime``."""
+    variants = [(path, content)]
+    # mtime=0 keeps the gzip bytes the same for the same content
+    variants.append((path + ".gz", gzip.compress(content, compresslevel=9, mtime=0)))
+    if brotli is not None:
+        variants.append((path + ".br", brotli.compress(content, quality=11)))
+    for variant_path, variant in variants:
+        with open(variant_path, "wb") as f:
+            f.write(variant)
+        os.utime(variant_path, (mtime, mtime))
+
+
+def build_assets(public_dir: str = PUBLIC_DIR, dist_dir: str = DIST_DIR) -> dict:
+    """Rebuild ``dist_dir`` from the files in ``public_dir``. Returns the manifest."""
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.makedirs(dist_dir)
+
+    names = sorted(
+        name for name in os.listdir(public_dir)
+        if os.path.isfile(os.path.join(public_dir, name)) and name.endswith(SOURCE_EXTENSIONS)
+    )
+    names.sort(key=lambda name: name.endswith(REFERENCING_EXTENSIONS))
+
+    manifest = {}
+    newest_referenced = 0.0
+    for name in names:
+        source = os.path.join(public_dir, name)
+        with open(source, "rb") as f:
+            original = f.read()
+        mtime = os.stat(source).st_mtime
+        content = minify(name, original)
+        if name.endswith(REFERENCING_EXTENSIONS):
+            content = rewrite_references(content, manifest)
+            mtime = max(mtime, newest_referenced)
+        else:
+            newest_referenced = max(newest_referenced, mtime)
+        output = built_name(name, content)
+        write_variants(os.path.join(dist_dir, output), content, mtime)
+        manifest[name] = output
+        print(f"  {name} -> dist/{output} ({len(original)} -> {len(content)} bytes)")
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def main():
+    if rjsmin is None:
+        print("⚠️  rjsmin not installed: JavaScript is copied without minification")
+    if brotli is None:
+        print("⚠️  brotli not installed: only gzip variants are built")
+    manifest = build_assets()
+    print(f"✅ Built {len(manifest)} asset(s) into {DIST_DIR}")
+
+
+if __name__ == "__main__":
+    main()
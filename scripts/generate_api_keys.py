@@ -5,16 +5,11 @@ This script adds the api_key field to existing Merchant accounts.
 Run this if you're getting "Cannot read api_key" errors.
 """
 
-import secrets
+from app.core.auth import issue_api_key
 from app.core.database import SessionLocal
 from app.models import Merchant
 
 
-def generate_api_key() -> str:
-    """Generate a secure API key."""
-    return f"pk_live_{secrets.token_urlsafe(32)}"
-
-
 def add_api_keys_to_merchants():
     """Add API keys to all merchants that don't have one."""
     db = SessionLocal()
@@ -23,9 +18,8 @@ def add_api_keys_to_merchants():
         updated_count = 0
         
         for merchant in merchants:
-            if not hasattr(merchant, 'api_key') or not merchant.api_key:
-                api_key = generate_api_key()
-                merchant.api_key = api_key
+            if not merchant.api_key and not merchant.api_key_hash:
+                api_key = issue_api_key(merchant)
                 print(f"✅ Generated API key for {merchant.email}")
                 print(f"   API Key: {api_key}")
                 updated_count += 1
@@ -53,8 +47,7 @@ def generate_api_key_for_email(email: str):
             print(f"❌ Merchant {email} not found")
             return
         
-        api_key = generate_api_key()
-        merchant.api_key = api_key
+        api_key = issue_api_key(merchant)
         db.commit()
         
         print(f"✅ API Key generated for {merchant.email}")
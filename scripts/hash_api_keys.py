@@ -0,0 +1,50 @@
+"""
+Hash Existing API Keys
+
+Replaces plaintext merchant API keys with their lookup prefix and HMAC
+hash. Run once after migrations/hash_api_keys.sql, with the same
+API_KEY_HASH_SECRET (or JWT_SECRET) as the API. Merchants keep using
+their current keys.
+"""
+
+from app.core.database import SessionLocal
+from app.core.security import api_key_prefix, hash_api_key
+from app.models import Merchant
+
+
+def main():
+    """Hash every plaintext API key in a single transaction."""
+    db = SessionLocal()
+    try:
+        merchants = db.query(Merchant).filter(
+            Merchant.api_key.isnot(None),
+            Merchant.api_key_hash.is_(None)
+        ).all()
+        
+        prefixes = {
+            prefix for (prefix,) in db.query(Merchant.api_key_prefix).filter(Merchant.api_key_prefix.isnot(None))
+        }
+        hashed_count = 0
+        
+        for merchant in merchants:
+            prefix = api_key_prefix(merchant.api_key)
+            if prefix in prefixes:
+                print(f"⚠️  Skipping {merchant.email}: key prefix already in use, rotate this key instead")
+                continue
+            prefixes.add(prefix)
+            merchant.api_key_prefix = prefix
+            merchant.api_key_hash = hash_api_key(merchant.api_key)
+            merchant.api_key = None
+            hashed_count += 1
+        
+        db.commit()
+        print(f"✅ Hashed API keys of {hashed_count} merchant(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Rebuild Payment Rollups
+
+Recomputes the payment_rollups table from payment_sessions.
+Run this once after deploying the rollup table, or whenever the
+dashboard counters need to be reconciled with the sessions table.
+"""
+
+from app.core.database import SessionLocal
+from app.services.payment_rollups import rebuild_payment_rollups
+
+
+def main():
+    """Rebuild all payment rollups in a single transaction."""
+    db = SessionLocal()
+    try:
+        processed = rebuild_payment_rollups(db)
+        db.commit()
+        print(f"✅ Rebuilt payment rollups from {processed} session(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()